@@ -1,84 +1,320 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, g
 from flask_cors import CORS
-from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
-import re
-import json
-from anthropic import Anthropic
+import threading
+import hashlib
+import time
+import database
+import exports
+import http_cache
+import json_provider
+import live
+import metrics
+import response_cache
+from database import LazyClient, LazyCollection, LazyDatabase
+from leaderboards import (
+    BATTING_METRICS, BOWLING_METRICS, Leaderboard,
+    build_batting_entries, build_bowling_entries, overs_to_balls
+)
+from name_index import PrefixTrie
+from odi_analytics import DIMENSIONS as ODI_DIMENSIONS, get_cube as get_odi_cube
+from odi_history import get_history as get_odi_history, parse_date_arg
+from profiles import PROFILES_COLLECTION, build_profile
+from search_planner import SearchPlanner
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = json_provider.FastJSONProvider(app)
 CORS(app)
 
 # Load environment variables
 load_dotenv()
 
 # MongoDB Connection
-try:
-    MONGO_URI = os.getenv('MONGO_URI')
-    print(f"Connecting to MongoDB with URI: {MONGO_URI[:MONGO_URI.find('@')]}...")
-    client = MongoClient(MONGO_URI)
-    
-    # Test the connection
-    client.server_info()  # Will raise an exception if connection fails
-    print("Successfully connected to MongoDB server")
-    
-    # List all database names
-    print("Available databases:", client.list_database_names())
-    
-    # Connect to the specific database
-    db_name = 'hello'
-    db = client[db_name]
-    print(f"Using database: {db_name}")
-    
-    # Initialize collections
-    players_collection = db['WCPlayersInfoODIWC2023']
-    players_info_collection = db['ODIplayers_info']  # Collection with player images
-    matches_collection = db['matchScheduleResultsODIWC2023']
-    batting_collection = db['battingODIWC2023']
-    bowling_collection = db['bowlingODIWC2023']
-    
-    # List collections in the database
-    print(f"Available collections in {db_name}:", db.list_collection_names())
-    
-except Exception as e:
-    print(f"Error connecting to MongoDB: {str(e)}")
-    print("Please check your MONGO_URI in the .env file and ensure MongoDB is running")
-    raise
+# The client is created on first use, so importing the app (a serverless
+# cold start) never waits for the database; see /api/health for diagnostics
+client = LazyClient()
+db = LazyDatabase()
+
+# Initialize collections
+players_collection = LazyCollection('WCPlayersInfoODIWC2023')
+players_info_collection = LazyCollection('ODIplayers_info')  # Collection with player images
+matches_collection = LazyCollection('matchScheduleResultsODIWC2023')
+batting_collection = LazyCollection('battingODIWC2023')
+bowling_collection = LazyCollection('bowlingODIWC2023')
+profiles_collection = LazyCollection(PROFILES_COLLECTION)  # Precomputed player profiles
+
+# Data version tracking
+# Every write path bumps a per-collection counter in the meta collection.
+# Derived structures (moment lists, leaderboards, ...) are tagged with the
+# versions they were built from and rebuilt only when those change.
+meta_collection = LazyCollection('meta')
+DATA_VERSION_CHECK_INTERVAL = float(os.getenv('DATA_VERSION_CHECK_INTERVAL', 30))
+
+_data_versions = {}
+_data_versions_checked_at = 0.0
+_derived_cache = {}
+_derived_cache_lock = threading.Lock()
+
+def get_data_versions():
+    """Get the version counter of every collection, re-read at most once per check interval"""
+    global _data_versions, _data_versions_checked_at
+    now = time.monotonic()
+    if now - _data_versions_checked_at >= DATA_VERSION_CHECK_INTERVAL:
+        _data_versions = {doc['_id']: doc.get('version', 0) for doc in meta_collection.find({})}
+        _data_versions_checked_at = now
+    return _data_versions
+
+def data_version(*collections):
+    """Get the combined version of the given collections"""
+    versions = get_data_versions()
+    return tuple(versions.get(collection.name, 0) for collection in collections)
+
+def bump_data_version(*collections):
+    """Mark collections as changed so derived data and cached responses get rebuilt"""
+    global _data_versions_checked_at
+    for collection in collections:
+        meta_collection.update_one({'_id': collection.name}, {'$inc': {'version': 1}}, upsert=True)
+    _data_versions_checked_at = 0.0
+    response_cache.cache.invalidate()
+
+def get_derived(key, collections, build):
+    """Return a cached value derived from collections, rebuilding it when their data changes"""
+    version = data_version(*collections)
+    entry = _derived_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = build()
+    with _derived_cache_lock:
+        _derived_cache[key] = (version, value)
+    return value
+
+def derived_json_response(key, collections, build):
+    """Serve derived data as JSON, encoding it only when the collections change"""
+    body = get_derived(key, collections, lambda: json_provider.dumps(build()))
+    return app.response_class(body, mimetype=app.json.mimetype)
+
+# Metrics
+# Every request and MongoDB command is timed and exposed at /metrics. These
+# hooks are registered before the caching hooks, so the timer starts first
+# and, since after_request hooks run in reverse order, stops after the
+# response has been compressed.
+metrics.register_command_listener()
+
+@app.before_request
+def start_request_metrics():
+    rule = request.url_rule
+    metrics.start_request(rule.rule if rule is not None else 'unmatched', request.method)
+
+@app.after_request
+def record_request_metrics(response):
+    metrics.finish_request(response.status_code, None if response.is_streamed else response.content_length)
+    return response
+
+# HTTP caching
+# API responses only change with the code or the data versions, so their
+# ETag is known before the view runs and revalidations skip the work.
+CODE_VERSION = http_cache.source_version()
+
+@app.before_request
+def answer_not_modified():
+    """Compute the API response ETag and answer matching If-None-Match requests with 304"""
+    if (request.method not in ('GET', 'HEAD') or not request.path.startswith('/api/')
+            or request.endpoint not in app.view_functions
+            or http_cache.cache_control(request.endpoint) is None):
+        return None
+    try:
+        url = http_cache.normalized_url(request.path, request.args)
+        g.etag = http_cache.response_etag(CODE_VERSION, get_data_versions(), url)
+    except Exception as e:
+        # Let the view report the database error
+        app.logger.warning('Error computing ETag: %s', e)
+        return None
+
+    if request.if_none_match.contains_weak(g.etag):
+        return app.response_class(status=304)
+    return None
+
+@app.before_request
+def serve_cached_response():
+    """Answer from the response cache, or wait for a concurrent request building the same response"""
+    if request.method != 'GET' or g.get('etag') is None or response_cache.ttl(request.endpoint) is None:
+        return None
+    # The ETag already covers the code, the data versions and the normalized URL
+    key = (g.etag, http_cache.choose_encoding(request.accept_encodings))
+    result, entry = response_cache.cache.begin(key)
+    metrics.RESPONSE_CACHE.inc(request.url_rule.rule, result)
+    if entry is not None:
+        g.cached_response = True
+        response = app.response_class(entry.body, status=entry.status, headers=entry.headers)
+        response.headers['X-Cache'] = 'HIT'
+        # Views that set their own ETag (the scorecard) are revalidated here
+        return response.make_conditional(request)
+    if result == 'lead':
+        g.response_cache_key = key
+    return None
+
+@app.after_request
+def add_cache_headers(response):
+    """Add ETag and Cache-Control to API responses and compress large bodies"""
+    etag = g.get('etag')
+    if etag is None or g.get('cached_response'):
+        return response
+    if response.status_code not in (200, 304):
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    response.headers['Cache-Control'] = http_cache.cache_control(request.endpoint)
+    if 'ETag' not in response.headers:
+        response.set_etag(etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    response = http_cache.compress_response(response, request.accept_encodings)
+
+    key = g.pop('response_cache_key', None)
+    if key is not None:
+        if response.status_code == 200 and not response.is_streamed and not response.direct_passthrough:
+            response.headers['X-Cache'] = 'MISS'
+            response_cache.cache.finish(key, response.status_code, list(response.headers.items()),
+                                        response.get_data(), response_cache.ttl(request.endpoint))
+        else:
+            response_cache.cache.finish(key)
+    return response
+
+@app.teardown_request
+def release_response_cache(exc):
+    """Release requests waiting on a response that failed or was not cacheable"""
+    key = g.pop('response_cache_key', None)
+    if key is not None:
+        response_cache.cache.finish(key)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def load_overview():
+    """Dashboard overview statistics"""
+    total_matches, total_players, runs_result, wickets_result = database.run_concurrently(
+        lambda: matches_collection.count_documents({}),
+        lambda: players_collection.count_documents({}),
+        lambda: list(batting_collection.aggregate([
+            {'$group': {'_id': None, 'total': {'$sum': '$Runs'}}}
+        ])),
+        lambda: list(bowling_collection.aggregate([
+            {'$group': {'_id': None, 'total': {'$sum': '$Wickets'}}}
+        ]))
+    )
+
+    return {
+        'total_matches': total_matches,
+        'total_players': total_players,
+        'total_runs': runs_result[0]['total'] if runs_result else 0,
+        'total_wickets': wickets_result[0]['total'] if wickets_result else 0
+    }
+
+@app.route('/api/health')
+def get_health():
+    """Check the database connection and report diagnostics"""
+    try:
+        response = jsonify({'status': 'ok', **database.health()})
+    except Exception as e:
+        app.logger.warning('Health check failed: %s', e)
+        response = jsonify({'status': 'unavailable', 'error': str(e)})
+        response.status_code = 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/metrics')
+def get_metrics():
+    """Request and MongoDB command metrics in the Prometheus text format"""
+    return app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/stats/overview')
 def get_overview():
     """Get dashboard overview statistics"""
     try:
-        total_matches = matches_collection.count_documents({})
-        total_players = players_collection.count_documents({})
-        total_runs = batting_collection.aggregate([
-            {'$group': {'_id': None, 'total': {'$sum': '$Runs'}}}
-        ])
-        total_wickets = bowling_collection.aggregate([
-            {'$group': {'_id': None, 'total': {'$sum': '$Wickets'}}}
-        ])
-        
-        runs_result = list(total_runs)
-        wickets_result = list(total_wickets)
-        
-        return jsonify({
-            'total_matches': total_matches,
-            'total_players': total_players,
-            'total_runs': runs_result[0]['total'] if runs_result else 0,
-            'total_wickets': wickets_result[0]['total'] if wickets_result else 0
-        })
+        return jsonify(load_overview())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# List endpoints return a compact set of fields unless fields= asks for
+# more, ordered by a unique key so after=<last key> pages through them
+PLAYER_FIELDS = ['player_name', 'team_name', 'playingRole', 'battingStyle', 'bowlingStyle',
+                 'image_of_player', 'description']
+# Player fields the dashboard needs for lists, flags and modal headers;
+# descriptions and images come with the player performance instead
+PLAYER_DIRECTORY_FIELDS = ['player_name', 'team_name', 'playingRole', 'battingStyle', 'bowlingStyle']
+MATCH_FIELDS = ['Match_no', 'Date', 'Venue', 'Team1', 'Team2', 'Winner', 'Scorecard URL']
+MATCH_LIST_FIELDS = ['Match_no', 'Date', 'Venue', 'Team1', 'Team2', 'Winner']
+LIST_MAX_LIMIT = 500
+
+ARG_TYPES = {int: 'an integer', float: 'a number'}
+
+def query_arg(name, default=None, convert=int):
+    """A numeric query argument, or the default when it is absent or empty
+
+    Raises ValueError with a message naming the argument when it is not a number.
+    """
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return convert(value)
+    except ValueError:
+        raise ValueError(f'{name} must be {ARG_TYPES[convert]}') from None
+
+def list_projection(available_fields, default_fields, key_field):
+    """Projection for the fields argument: a comma-separated subset of the available fields, or 'all'"""
+    fields = request.args.get('fields')
+    if not fields:
+        selected = default_fields
+    elif fields == 'all':
+        selected = available_fields
+    else:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in available_fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s) {', '.join(unknown)}. Use 'all' or any of: {', '.join(available_fields)}")
+
+    projection = {field: 1 for field in selected}
+    # The key is needed to request the next page
+    projection[key_field] = 1
+    projection['_id'] = 0
+    return projection
+
+def keyset_page(collection, query, projection, key_field, after=None):
+    """Serve documents in key order, starting after the given key, at most limit of them
+
+    Without a limit every matching document is returned. When there are more
+    after the page, X-Next-After holds the key to pass as after= next.
+    """
+    limit = query_arg('limit')
+    limit = min(max(limit, 1), LIST_MAX_LIMIT) if limit else None
+
+    if after is not None:
+        after_query = {key_field: {'$gt': after}}
+        query = {'$and': [query, after_query]} if query else after_query
+
+    cursor = collection.find(query, projection).sort(key_field, 1)
+    if limit:
+        # One extra document tells whether another page exists
+        cursor = cursor.limit(limit + 1)
+    documents = list(cursor)
+
+    next_after = None
+    if limit and len(documents) > limit:
+        documents = documents[:limit]
+        next_after = documents[-1][key_field]
+
+    response = jsonify(documents)
+    if next_after is not None:
+        response.headers['X-Next-After'] = str(next_after)
+    return response
+
 @app.route('/api/players')
 def get_players():
-    """Get all players with filtering"""
+    """Get players with filtering, field selection and keyset pagination"""
     try:
         team = request.args.get('team')
         role = request.args.get('role')
@@ -91,223 +327,182 @@ def get_players():
             query['playingRole'] = role
         if search:
             query['player_name'] = {'$regex': search, '$options': 'i'}
-        
-        players = list(players_collection.find(query, {'_id': 0}))
-        return jsonify(players)
+
+        projection = list_projection(PLAYER_FIELDS, PLAYER_DIRECTORY_FIELDS, 'player_name')
+        if not request.args:
+            # The whole directory, as the dashboard requests it
+            return derived_json_response(
+                'player_directory_json',
+                (players_collection,),
+                lambda: list(players_collection.find({}, projection).sort('player_name', 1))
+            )
+        return keyset_page(players_collection, query, projection, 'player_name', request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def load_teams():
+    """Sorted unique team names"""
+    return sorted(players_collection.distinct('team_name'))
+
 @app.route('/api/teams')
 def get_teams():
     """Get all unique teams"""
     try:
-        teams = players_collection.distinct('team_name')
-        return jsonify(sorted(teams))
+        return jsonify(load_teams())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_schedule_keys():
+    """Stored team spellings keyed by lowercase canonical name, and the list of venues"""
+    def build():
+        teams = {}
+        for team in matches_collection.distinct('Team1') + matches_collection.distinct('Team2'):
+            teams.setdefault(' '.join(team.split()).lower(), set()).add(team)
+        return {key: sorted(values) for key, values in teams.items()}, matches_collection.distinct('Venue')
+    return get_derived('schedule_keys', (matches_collection,), build)
+
+def team_spellings(team):
+    """Exact stored values for a team name, matched case-insensitively
+
+    Ingested data holds one canonical spelling per team; older imports may
+    still carry stray whitespace variants, which are all returned.
+    """
+    teams, _ = get_schedule_keys()
+    return teams.get(' '.join(team.split()).lower(), [team.strip()])
+
+def matching_venues(venue):
+    """Venues whose name contains the given text, ignoring case"""
+    _, venues = get_schedule_keys()
+    return [name for name in venues if venue.lower() in name.lower()]
+
 @app.route('/api/matches')
 def get_matches():
-    """Get all matches with optional filtering"""
+    """Get matches with optional filtering, field selection and keyset pagination"""
     try:
         team = request.args.get('team')
         venue = request.args.get('venue')
 
+        # Filters are resolved against the known names first so the query
+        # itself is an exact, indexable match
         query = {}
         if team:
-            # Use regex with trim to handle whitespace inconsistencies
-            team_pattern = f'^\\s*{re.escape(team)}\\s*$'
+            spellings = team_spellings(team)
             query['$or'] = [
-                {'Team1': {'$regex': team_pattern, '$options': 'i'}},
-                {'Team2': {'$regex': team_pattern, '$options': 'i'}}
+                {'Team1': {'$in': spellings}},
+                {'Team2': {'$in': spellings}}
             ]
         if venue:
-            query['Venue'] = {'$regex': venue, '$options': 'i'}
-
-        matches = list(matches_collection.find(query, {'_id': 0}).sort('Match_no', 1))
-        return jsonify(matches)
+            query['Venue'] = {'$in': matching_venues(venue)}
+
+        projection = list_projection(MATCH_FIELDS, MATCH_LIST_FIELDS, 'Match_no')
+        if not request.args:
+            # The whole schedule, as the dashboard requests it
+            return derived_json_response(
+                'match_list_json',
+                (matches_collection,),
+                lambda: list(matches_collection.find({}, projection).sort('Match_no', 1))
+            )
+        return keyset_page(matches_collection, query, projection, 'Match_no', query_arg('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_batting_leaderboard():
+    """Batting leaderboard materialized from the batting collection"""
+    return get_derived(
+        'batting_leaderboard',
+        (batting_collection,),
+        lambda: Leaderboard(
+            build_batting_entries(batting_collection.find({}, {'_id': 0})),
+            BATTING_METRICS,
+            'batsman'
+        )
+    )
+
+def get_bowling_leaderboard():
+    """Bowling leaderboard materialized from the bowling collection"""
+    return get_derived(
+        'bowling_leaderboard',
+        (bowling_collection,),
+        lambda: Leaderboard(
+            build_bowling_entries(bowling_collection.find({}, {'_id': 0})),
+            BOWLING_METRICS,
+            'bowler'
+        )
+    )
+
+def leaderboard_response(leaderboard, default_sort, minimum_args):
+    """Serve one page of a leaderboard according to the request arguments"""
+    sort = request.args.get('sort', default_sort)
+    try:
+        limit = max(query_arg('limit', 10), 0)
+        offset = max(query_arg('offset', 0), 0)
+
+        # Minimum qualification, e.g. min_matches=3
+        minimums = {}
+        for arg, (field, convert) in minimum_args.items():
+            value = query_arg(arg, convert=float)
+            if value is not None:
+                minimums[field] = convert(value)
+
+        total, entries = leaderboard.page(sort, offset=offset, limit=limit, minimums=minimums)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify(entries)
+    response.headers['X-Total-Count'] = str(total)
+    return response
+
 @app.route('/api/batting/top')
 def get_top_batsmen():
-    """Get top run scorers"""
+    """Get top run scorers
+
+    Query args: sort (comma-separated metrics, '-' prefix reverses), offset,
+    limit and min_matches / min_innings / min_runs / min_balls.
+    """
     try:
-        limit = int(request.args.get('limit', 10))
-        
-        # First, remove duplicates by grouping by player + match_no + match_between
-        # then aggregate by player to get totals
-        pipeline = [
-            # Step 1: Group by player, match_no, and match to remove duplicates
-            {'$group': {
-                '_id': {
-                    'player': '$Batsman_Name',
-                    'match_no': '$Match_no',
-                    'match': '$Match_Between'
-                },
-                'runs': {'$first': '$Runs'},
-                'balls': {'$first': '$Balls'},
-                'fours': {'$first': '$4s'},
-                'sixes': {'$first': '$6s'}
-            }},
-            # Step 2: Group by player to get totals
-            {'$group': {
-                '_id': '$_id.player',
-                'total_runs': {'$sum': '$runs'},
-                'total_balls': {'$sum': '$balls'},
-                'total_4s': {'$sum': '$fours'},
-                'total_6s': {'$sum': '$sixes'},
-                'matches': {'$sum': 1}
-            }},
-            {'$project': {
-                'batsman': '$_id',
-                'total_runs': 1,
-                'total_balls': 1,
-                'total_4s': 1,
-                'total_6s': 1,
-                'matches': 1,
-                'strike_rate': {
-                    '$cond': [
-                        {'$eq': ['$total_balls', 0]},
-                        0,
-                        {'$multiply': [{'$divide': ['$total_runs', '$total_balls']}, 100]}
-                    ]
-                }
-            }},
-            {'$sort': {'total_runs': -1}},
-            {'$limit': limit}
-        ]
-        
-        result = list(batting_collection.aggregate(pipeline))
-        return jsonify(result)
+        return leaderboard_response(get_batting_leaderboard(), 'runs', {
+            'min_matches': ('matches', int),
+            'min_innings': ('innings', int),
+            'min_runs': ('total_runs', int),
+            'min_balls': ('total_balls', int)
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/bowling/top')
 def get_top_bowlers():
-    """Get top wicket takers"""
-    try:
-        limit = int(request.args.get('limit', 10))
-
-        # First, remove duplicates by grouping by bowler + match_no + match_between
-        # then aggregate by bowler to get totals
-        pipeline = [
-            # Step 1: Group by bowler, match_no, and match to remove duplicates
-            {'$group': {
-                '_id': {
-                    'bowler': '$Bowler_Name',
-                    'match_no': '$Match_no',
-                    'match': '$Match_Between'
-                },
-                'wickets': {'$first': '$Wickets'},
-                'runs': {'$first': '$Runs'},
-                'overs': {'$first': '$Overs'},
-                'maidens': {'$first': '$Maidens'}
-            }},
-            # Step 2: Group by bowler to get totals
-            {'$group': {
-                '_id': '$_id.bowler',
-                'total_wickets': {'$sum': '$wickets'},
-                'total_runs': {'$sum': '$runs'},
-                'overs_list': {'$push': '$overs'},  # Collect all overs to process
-                'total_maidens': {'$sum': '$maidens'},
-                'matches': {'$sum': 1}
-            }},
-            {'$sort': {'total_wickets': -1}},
-            {'$limit': limit}
-        ]
-
-        raw_result = list(bowling_collection.aggregate(pipeline))
-
-        # Process each bowler to correctly calculate total overs
-        result = []
-        for bowler in raw_result:
-            # Convert cricket overs to balls and sum them up
-            total_balls = 0
-            for overs in bowler['overs_list']:
-                # overs like 9.5 means 9 overs + 5 balls = (9*6) + 5 = 59 balls
-                overs_int = int(overs)
-                balls_remainder = int(round((overs - overs_int) * 10))  # Get decimal part as balls
-                total_balls += (overs_int * 6) + balls_remainder
-
-            # Convert total balls back to cricket overs format
-            overs_bowled = total_balls // 6
-            balls_bowled = total_balls % 6
-            total_overs_cricket = float(f"{overs_bowled}.{balls_bowled}")
-
-            # Calculate economy (runs per over)
-            economy = (bowler['total_runs'] / total_balls * 6) if total_balls > 0 else 0
-
-            result.append({
-                'bowler': bowler['_id'],
-                'total_wickets': bowler['total_wickets'],
-                'total_runs': bowler['total_runs'],
-                'total_overs': total_overs_cricket,
-                'total_balls': total_balls,
-                'total_maidens': bowler['total_maidens'],
-                'matches': bowler['matches'],
-                'economy': economy
-            })
+    """Get top wicket takers
 
-        return jsonify(result)
+    Query args: sort (comma-separated metrics, '-' prefix reverses), offset,
+    limit and min_matches / min_wickets / min_overs.
+    """
+    try:
+        return leaderboard_response(get_bowling_leaderboard(), 'wickets', {
+            'min_matches': ('matches', int),
+            'min_wickets': ('total_wickets', int),
+            'min_overs': ('total_balls', overs_to_balls)
+        })
     except Exception as e:
-        print(f"Error in get_top_bowlers: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception('Error in get_top_bowlers')
         return jsonify({'error': str(e)}), 500
 
-def levenshtein_distance(s1, s2):
-    """Calculate the Levenshtein distance between two strings"""
-    s1, s2 = s1.lower(), s2.lower()
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-
-    if len(s2) == 0:
-        return len(s1)
-
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-
-    return previous_row[-1]
-
-def fuzzy_match(query, candidates, threshold=2):
-    """Find candidates that match the query within a certain edit distance threshold"""
-    matches = []
-    query_lower = query.lower()
-
-    for candidate in candidates:
-        candidate_lower = candidate.lower()
-
-        # Exact match gets highest priority
-        if query_lower in candidate_lower:
-            matches.append((candidate, 0))
-        else:
-            # Check if query matches any word in the candidate
-            words = candidate_lower.split()
-            min_distance = float('inf')
-
-            for word in words:
-                distance = levenshtein_distance(query_lower, word)
-                min_distance = min(min_distance, distance)
-
-            # Also check full name distance for short queries
-            if len(query_lower) >= 3:
-                full_distance = levenshtein_distance(query_lower, candidate_lower)
-                min_distance = min(min_distance, full_distance)
+SEARCH_COLLECTIONS = {
+    'players': players_collection,
+    'batting': batting_collection,
+    'bowling': bowling_collection
+}
 
-            if min_distance <= threshold:
-                matches.append((candidate, min_distance))
-
-    # Sort by distance (closer matches first)
-    matches.sort(key=lambda x: x[1])
-    return [match[0] for match in matches]
+def get_search_planner():
+    """Query planner over the current player names and schedule, with its cache of parsed plans"""
+    return get_derived(
+        'search_planner',
+        (players_collection, matches_collection),
+        lambda: SearchPlanner(players_collection.distinct('player_name'), get_match_lookup().values())
+    )
 
 @app.route('/api/search')
 def natural_language_search():
@@ -318,293 +513,422 @@ def natural_language_search():
         if not query:
             return jsonify({'error': 'Query parameter required'}), 400
 
+        # One aggregation per query; team and venue matches come from the
+        # planner's copy of the schedule
+        plan = get_search_planner().plan(query)
         results = {
             'players': [],
-            'matches': [],
-            'stats': {}
+            'matches': plan['matches'],
+            'stats': {},
+            'query': plan['interpretation']
         }
+        if plan['collection']:
+            results['players'] = list(SEARCH_COLLECTIONS[plan['collection']].aggregate(plan['pipeline']))
 
-        # Get all unique player names and team names for fuzzy matching
-        all_players = players_collection.distinct('player_name')
-        all_teams = matches_collection.distinct('Team1')
-
-        # Determine search threshold based on query length
-        threshold = 1 if len(query) <= 4 else 2
-
-        # Fuzzy match player names
-        matched_players = fuzzy_match(query, all_players, threshold)
-
-        # Fuzzy match team names
-        matched_teams = fuzzy_match(query, all_teams, threshold)
-
-        # Search patterns with fuzzy support
-        if any(word in query for word in ['batsman', 'batter', 'runs', 'scored']):
-            # Extract the name part from query
-            name_query = ' '.join([word for word in query.split() if word not in ['batsman', 'batter', 'runs', 'scored', 'top', 'best']])
-
-            if name_query:
-                matched_players = fuzzy_match(name_query, all_players, threshold)
-
-            if matched_players:
-                results['players'] = list(batting_collection.aggregate([
-                    {'$match': {'Batsman_Name': {'$in': matched_players}}},
-                    {'$group': {
-                        '_id': '$Batsman_Name',
-                        'total_runs': {'$sum': '$Runs'}
-                    }},
-                    {'$sort': {'total_runs': -1}},
-                    {'$limit': 10}
-                ]))
-            else:
-                # Fallback to top batsmen
-                results['players'] = list(batting_collection.aggregate([
-                    {'$group': {
-                        '_id': '$Batsman_Name',
-                        'total_runs': {'$sum': '$Runs'}
-                    }},
-                    {'$sort': {'total_runs': -1}},
-                    {'$limit': 5}
-                ]))
-
-        elif any(word in query for word in ['bowler', 'wickets', 'bowling']):
-            # Extract the name part from query
-            name_query = ' '.join([word for word in query.split() if word not in ['bowler', 'wickets', 'bowling', 'top', 'best']])
-
-            if name_query:
-                matched_players = fuzzy_match(name_query, all_players, threshold)
-
-            if matched_players:
-                results['players'] = list(bowling_collection.aggregate([
-                    {'$match': {'Bowler_Name': {'$in': matched_players}}},
-                    {'$group': {
-                        '_id': '$Bowler_Name',
-                        'total_wickets': {'$sum': '$Wickets'}
-                    }},
-                    {'$sort': {'total_wickets': -1}},
-                    {'$limit': 10}
-                ]))
-            else:
-                # Fallback to top bowlers
-                results['players'] = list(bowling_collection.aggregate([
-                    {'$group': {
-                        '_id': '$Bowler_Name',
-                        'total_wickets': {'$sum': '$Wickets'}
-                    }},
-                    {'$sort': {'total_wickets': -1}},
-                    {'$limit': 5}
-                ]))
-
-        elif 'team' in query or matched_teams:
-            # Use fuzzy matched team
-            team_name = matched_teams[0] if matched_teams else None
-
-            if team_name:
-                results['players'] = list(players_collection.find({'team_name': {'$regex': f'^\\s*{re.escape(team_name)}\\s*$', '$options': 'i'}}, {'_id': 0}).limit(10))
-                results['matches'] = list(matches_collection.find({'$or': [{'Team1': {'$regex': f'^\\s*{re.escape(team_name)}\\s*$', '$options': 'i'}}, {'Team2': {'$regex': f'^\\s*{re.escape(team_name)}\\s*$', '$options': 'i'}}]}, {'_id': 0}).limit(5))
+        return jsonify(results)
+    except Exception as e:
+        app.logger.exception('Search error')
+        return jsonify({'error': str(e)}), 500
 
-        else:
-            # General fuzzy search for players
-            if matched_players:
-                results['players'] = list(players_collection.find({'player_name': {'$in': matched_players}}, {'_id': 0}).limit(10))
+SUGGEST_TYPE_ORDER = ('team', 'player', 'venue')
+SUGGEST_MAX_LIMIT = 20
+
+def build_suggest_trie():
+    """Build the typeahead trie over player names, teams and venues"""
+    entries = []
+    for player in players_collection.find({}, {'_id': 0, 'player_name': 1, 'team_name': 1}):
+        if player.get('player_name', '').strip():
+            entries.append({
+                'type': 'player',
+                'name': player['player_name'],
+                'team': player.get('team_name', '').strip()
+            })
 
-            # General fuzzy search for matches (teams)
-            if matched_teams:
-                results['matches'] = list(matches_collection.find({'$or': [{'Team1': {'$in': matched_teams}}, {'Team2': {'$in': matched_teams}}]}, {'_id': 0}).limit(5))
+    # Team names carry stray whitespace in the schedule
+    teams = {team.strip() for team in matches_collection.distinct('Team1') + matches_collection.distinct('Team2')}
+    entries.extend({'type': 'team', 'name': team} for team in sorted(teams) if team)
 
-        return jsonify(results)
+    entries.extend({'type': 'venue', 'name': venue} for venue in matches_collection.distinct('Venue') if venue)
+
+    return PrefixTrie(entries, SUGGEST_TYPE_ORDER, max_results=SUGGEST_MAX_LIMIT)
+
+@app.route('/api/suggest')
+def get_suggestions():
+    """Typeahead suggestions for players, teams and venues"""
+    try:
+        query = request.args.get('q', '')
+        try:
+            limit = min(max(query_arg('limit', 8), 0), SUGGEST_MAX_LIMIT)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        trie = get_derived('suggest_trie', (players_collection, matches_collection), build_suggest_trie)
+
+        return jsonify({'query': query, 'suggestions': trie.suggest(query, limit)})
     except Exception as e:
-        print(f"Search error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def load_venues():
+    """Sorted unique venues"""
+    return sorted(matches_collection.distinct('Venue'))
+
 @app.route('/api/venues')
 def get_venues():
     """Get all unique venues"""
     try:
-        venues = matches_collection.distinct('Venue')
-        return jsonify(sorted(venues))
+        return jsonify(load_venues())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+BOOTSTRAP_COLLECTIONS = (matches_collection, players_collection, batting_collection, bowling_collection)
+
+def build_bootstrap():
+    """Everything the dashboard needs on load, in one payload"""
+    projection = {field: 1 for field in PLAYER_DIRECTORY_FIELDS}
+    projection['_id'] = 0
+    versions = get_data_versions()
+    return {
+        'version': '.'.join(str(versions.get(collection.name, 0)) for collection in BOOTSTRAP_COLLECTIONS),
+        'overview': load_overview(),
+        'teams': load_teams(),
+        'venues': load_venues(),
+        'players': list(players_collection.find({}, projection).sort('player_name', 1)),
+        'matches': list(matches_collection.find({}, {'_id': 0}).sort('Match_no', 1))
+    }
+
+@app.route('/api/bootstrap')
+def get_bootstrap():
+    """Get the overview, teams, venues, player directory and schedule in one response"""
+    try:
+        return derived_json_response('bootstrap', BOOTSTRAP_COLLECTIONS, build_bootstrap)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def get_match_lookup():
+    """Schedule documents keyed by match number"""
+    return get_derived(
+        'match_lookup',
+        (matches_collection,),
+        lambda: {match['Match_no']: match for match in matches_collection.find({}, {'_id': 0})}
+    )
+
+def assemble_player_profile(player_name):
+    """Build a player profile from the raw collections, for databases without stored profiles"""
+    # Batting, bowling, player info and image are independent reads and
+    # run concurrently; match details come from the cached schedule
+    batting_stats, bowling_stats, player_info, player_image_info = database.run_concurrently(
+        lambda: list(batting_collection.find({'Batsman_Name': player_name}, {'_id': 0})),
+        lambda: list(bowling_collection.find({'Bowler_Name': player_name}, {'_id': 0})),
+        # Player info including description from WCPlayersInfoODIWC2023
+        lambda: players_collection.find_one(
+            {'player_name': player_name},
+            {'_id': 0, 'description': 1, 'team_name': 1, 'playingRole': 1}
+        ),
+        # Player image from ODIplayers_info collection
+        lambda: players_info_collection.find_one(
+            {'player_name': player_name},
+            {'_id': 0, 'image_url': 1}
+        )
+    )
+    return build_profile(player_name, player_info, player_image_info, batting_stats, bowling_stats,
+                         get_match_lookup())
+
 @app.route('/api/player/performance/<path:player_name>')
 def get_player_performance(player_name):
-    """Get match-wise performance for a specific player"""
+    """Get the profile and match-wise performance of a player"""
     try:
         # URL decode the player name (handles spaces and special characters)
         from urllib.parse import unquote
         player_name = unquote(player_name)
 
-        print(f"Fetching performance for player: {player_name}")
+        # Profiles are precomputed by ingest.py, so this is one keyed read
+        profile = profiles_collection.find_one({'player_name': player_name}, {'_id': 0})
+        if profile is None:
+            # Not ingested yet, or an unknown player
+            profile = assemble_player_profile(player_name)
 
-        # Get batting performance
-        batting_stats = list(batting_collection.find(
-            {'Batsman_Name': player_name},
-            {'_id': 0}
-        ).sort('Match_no', 1))
+        app.logger.debug('Found %d batting and %d bowling records for %s',
+                         len(profile['batting']), len(profile['bowling']), player_name)
 
-        # Get bowling performance
-        bowling_stats = list(bowling_collection.find(
-            {'Bowler_Name': player_name},
-            {'_id': 0}
-        ).sort('Match_no', 1))
-
-        print(f"Found {len(batting_stats)} batting records and {len(bowling_stats)} bowling records")
-
-        # Get match details for context
-        match_numbers = set()
-        for stat in batting_stats:
-            if 'Match_no' in stat:
-                match_numbers.add(stat['Match_no'])
-        for stat in bowling_stats:
-            if 'Match_no' in stat:
-                match_numbers.add(stat['Match_no'])
-
-        # Fetch match details
-        matches = {}
-        if match_numbers:
-            match_docs = matches_collection.find(
-                {'Match_no': {'$in': list(match_numbers)}},
-                {'_id': 0}
-            )
-            for match in match_docs:
-                matches[match['Match_no']] = match
+        return jsonify(profile)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Combine batting stats with match info
-        for stat in batting_stats:
-            if stat.get('Match_no') in matches:
-                stat['match_info'] = matches[stat['Match_no']]
+def build_match_scorecard(match_no):
+    """Assemble the scorecard for a match from three bulk reads"""
+    match = matches_collection.find_one({'Match_no': match_no}, {'_id': 0})
+
+    if not match:
+        return None
+
+    # Batting performances in batting order; ties on position keep insertion
+    # order, so the first row is the opener of the first innings
+    batting_stats = list(batting_collection.find(
+        {'Match_no': match_no},
+        {'_id': 0}
+    ).sort([('Batting_Position', 1), ('_id', 1)]))
+
+    # Bowling performances for this match
+    bowling_stats = list(bowling_collection.find(
+        {'Match_no': match_no},
+        {'_id': 0}
+    ).sort([('Bowler_Name', 1)]))
+
+    match_team1 = match.get('Team1', '').strip()
+    match_team2 = match.get('Team2', '').strip()
+
+    # Group rows by the team recorded on them
+    batting_by_team = {}
+    for stat in batting_stats:
+        batting_by_team.setdefault(stat.get('Team_Innings', '').strip(), []).append(stat)
+
+    bowling_by_team = {}
+    for stat in bowling_stats:
+        bowling_by_team.setdefault(stat.get('Bowling_Team', '').strip(), []).append(stat)
+
+    # Show the team that batted first as team1
+    first_innings_team = batting_stats[0].get('Team_Innings', '').strip() if batting_stats else None
+    if first_innings_team == match_team2:
+        match_team1, match_team2 = match_team2, match_team1
+
+    return {
+        'match': match,
+        'team1_batting': batting_by_team.get(match_team1, []),
+        'team2_batting': batting_by_team.get(match_team2, []),
+        'team1_bowling': bowling_by_team.get(match_team1, []),
+        'team2_bowling': bowling_by_team.get(match_team2, []),
+        'team1_name': match_team1,
+        'team2_name': match_team2
+    }
+
+def _scorecard_cache_entry(match_no):
+    """Build a scorecard's JSON body together with its ETag, or (None, None) for an unknown match"""
+    scorecard = build_match_scorecard(match_no)
+    if scorecard is None:
+        return None, None
+    body = json_provider.dumps(scorecard)
+    return body, hashlib.sha1(body).hexdigest()
 
-        # Combine bowling stats with match info
-        for stat in bowling_stats:
-            if stat.get('Match_no') in matches:
-                stat['match_info'] = matches[stat['Match_no']]
+@app.route('/api/match/scorecard/<int:match_no>')
+def get_match_scorecard(match_no):
+    """Get detailed scorecard for a specific match"""
+    try:
+        scorecard_collections = (matches_collection, batting_collection, bowling_collection)
 
-        # Get player info including description from WCPlayersInfoODIWC2023
-        player_info = players_collection.find_one(
-            {'player_name': player_name},
-            {'_id': 0, 'description': 1, 'team_name': 1, 'playingRole': 1}
+        # Unknown matches are rejected without touching the database
+        match_numbers = get_derived(
+            'match_numbers',
+            (matches_collection,),
+            lambda: set(matches_collection.distinct('Match_no'))
         )
+        if match_no not in match_numbers:
+            return jsonify({'error': 'Match not found'}), 404
 
-        # Get player image from ODIplayers_info collection
-        player_image_info = players_info_collection.find_one(
-            {'player_name': player_name},
-            {'_id': 0, 'image_url': 1}
+        body, etag = get_derived(
+            ('scorecard', match_no),
+            scorecard_collections,
+            lambda: _scorecard_cache_entry(match_no)
         )
 
-        return jsonify({
-            'player_name': player_name,
-            'description': player_info.get('description', '') if player_info else '',
-            'team': player_info.get('team_name', '') if player_info else '',
-            'role': player_info.get('playingRole', '') if player_info else '',
-            'image': player_image_info.get('image_url', '') if player_image_info else '',
-            'batting': batting_stats,
-            'bowling': bowling_stats
-        })
+        if body is None:
+            return jsonify({'error': 'Match not found'}), 404
+
+        response = app.response_class(body, mimetype=app.json.mimetype)
+        response.set_etag(etag)
+        return response.make_conditional(request)
     except Exception as e:
+        app.logger.exception('Error fetching match scorecard')
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/match/scorecard/<int:match_no>')
-def get_match_scorecard(match_no):
-    """Get detailed scorecard for a specific match"""
-    try:
-        print(f"Fetching scorecard for match: {match_no}")
+MOMENT_TYPES = ['all', 'centuries', 'fifties', 'wickets', 'sixes', 'economy', 'explosive']
+
+def _century_moment(century, venue):
+    return {
+        'type': 'century',
+        'title': f"{century['Batsman_Name']} - Magnificent {century['Runs']}",
+        'description': f"Scored {century['Runs']} runs off {century['Balls']} balls with {century['4s']} fours and {century['6s']} sixes",
+        'player': century['Batsman_Name'],
+        'team': century['Team_Innings'],
+        'match_no': century['Match_no'],
+        'match': century.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'runs': century['Runs'],
+        'balls': century['Balls'],
+        'fours': century['4s'],
+        'sixes': century['6s'],
+        'strike_rate': century['Strike_Rate']
+    }
+
+def _fifty_moment(fifty, venue):
+    return {
+        'type': 'fifty',
+        'title': f"{fifty['Batsman_Name']} - Solid {fifty['Runs']}",
+        'description': f"Scored {fifty['Runs']} runs off {fifty['Balls']} balls",
+        'player': fifty['Batsman_Name'],
+        'team': fifty['Team_Innings'],
+        'match_no': fifty['Match_no'],
+        'match': fifty.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'runs': fifty['Runs'],
+        'balls': fifty['Balls'],
+        'fours': fifty['4s'],
+        'sixes': fifty['6s'],
+        'strike_rate': fifty['Strike_Rate']
+    }
+
+def _five_wickets_moment(performance, venue):
+    return {
+        'type': 'five_wickets',
+        'title': f"{performance['Bowler_Name']} - Devastating {performance['Wickets']}-wicket haul",
+        'description': f"Took {performance['Wickets']} wickets for {performance['Runs']} runs in {performance['Overs']} overs",
+        'player': performance['Bowler_Name'],
+        'team': performance['Bowling_Team'],
+        'match_no': performance['Match_no'],
+        'match': performance.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'wickets': performance['Wickets'],
+        'runs': performance['Runs'],
+        'overs': performance['Overs'],
+        'economy': performance['Economy']
+    }
+
+def _four_wickets_moment(performance, venue):
+    return {
+        'type': 'four_wickets',
+        'title': f"{performance['Bowler_Name']} - Brilliant {performance['Wickets']}-wicket spell",
+        'description': f"Took {performance['Wickets']} wickets for {performance['Runs']} runs in {performance['Overs']} overs",
+        'player': performance['Bowler_Name'],
+        'team': performance['Bowling_Team'],
+        'match_no': performance['Match_no'],
+        'match': performance.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'wickets': performance['Wickets'],
+        'runs': performance['Runs'],
+        'overs': performance['Overs'],
+        'economy': performance['Economy']
+    }
+
+def _big_hitting_moment(performance, venue):
+    return {
+        'type': 'big_hitting',
+        'title': f"{performance['Batsman_Name']} - {performance['6s']} Massive Sixes!",
+        'description': f"Smashed {performance['6s']} sixes while scoring {performance['Runs']} runs",
+        'player': performance['Batsman_Name'],
+        'team': performance['Team_Innings'],
+        'match_no': performance['Match_no'],
+        'match': performance.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'runs': performance['Runs'],
+        'sixes': performance['6s'],
+        'balls': performance['Balls'],
+        'fours': performance.get('4s', 0),
+        'strike_rate': performance.get('Strike_Rate', 0)
+    }
+
+def _economical_moment(performance, venue):
+    return {
+        'type': 'economical',
+        'title': f"{performance['Bowler_Name']} - Miserly {performance['Economy']} economy",
+        'description': f"Conceded just {performance['Runs']} runs in {performance['Overs']} overs at {performance['Economy']} economy",
+        'player': performance['Bowler_Name'],
+        'team': performance['Bowling_Team'],
+        'match_no': performance['Match_no'],
+        'match': performance.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'wickets': performance['Wickets'],
+        'runs': performance['Runs'],
+        'overs': performance['Overs'],
+        'economy': performance['Economy']
+    }
+
+def _explosive_moment(performance, venue):
+    return {
+        'type': 'explosive',
+        'title': f"{performance['Batsman_Name']} - Explosive {performance['Strike_Rate']} SR",
+        'description': f"Blitzed {performance['Runs']} runs off just {performance['Balls']} balls",
+        'player': performance['Batsman_Name'],
+        'team': performance['Team_Innings'],
+        'match_no': performance['Match_no'],
+        'match': performance.get('Match_Between', 'Unknown'),
+        'venue': venue,
+        'runs': performance['Runs'],
+        'balls': performance['Balls'],
+        'strike_rate': performance['Strike_Rate']
+    }
+
+def build_best_moments(moment_type):
+    """Assemble the moments for a type with one query per category and one bulk match lookup"""
+    categories = []
+
+    # CENTURIES (100+ runs)
+    if moment_type in ['all', 'centuries']:
+        centuries = batting_collection.find(
+            {'Runs': {'$gte': 100}},
+            {'_id': 0}
+        ).sort('Runs', -1)
+        categories.append((list(centuries), _century_moment))
 
-        # Get match details
-        match = matches_collection.find_one({'Match_no': match_no}, {'_id': 0})
+    # HALF-CENTURIES (50-99 runs)
+    if moment_type in ['all', 'fifties']:
+        fifties = batting_collection.find(
+            {'Runs': {'$gte': 50, '$lt': 100}},
+            {'_id': 0}
+        ).sort('Runs', -1).limit(30)
+        categories.append((list(fifties), _fifty_moment))
 
-        if not match:
-            return jsonify({'error': 'Match not found'}), 404
+    # 5-WICKET AND 4-WICKET HAULS
+    if moment_type in ['all', 'wickets']:
+        five_wickets = bowling_collection.find(
+            {'Wickets': {'$gte': 5}},
+            {'_id': 0}
+        ).sort('Wickets', -1)
+        categories.append((list(five_wickets), _five_wickets_moment))
 
-        # Get batting performances for this match (sorted by batting position)
-        batting_stats = list(batting_collection.find(
-            {'Match_no': match_no},
+        four_wickets = bowling_collection.find(
+            {'Wickets': 4},
             {'_id': 0}
-        ).sort([('Batting_Position', 1)]))
+        ).sort('Runs', 1).limit(20)
+        categories.append((list(four_wickets), _four_wickets_moment))
 
-        # Get bowling performances for this match
-        bowling_stats = list(bowling_collection.find(
-            {'Match_no': match_no},
+    # BIG HITTING (Most sixes in an innings)
+    if moment_type in ['all', 'sixes']:
+        big_hitters = batting_collection.find(
+            {'6s': {'$gte': 3}},
             {'_id': 0}
-        ).sort([('Bowler_Name', 1)]))
-
-        # Group batting stats by team using Team_Innings field
-        # Determine innings order based on which team appears first in collection
-        match_team1 = match.get('Team1', '').strip()
-        match_team2 = match.get('Team2', '').strip()
-
-        first_innings_team = None
-        team1_batting = []
-        team2_batting = []
-
-        for stat in batting_stats:
-            team_innings = stat.get('Team_Innings', '').strip()
-
-            # Capture the first team that appears in the collection
-            if first_innings_team is None:
-                first_innings_team = team_innings
-                print(f"First innings team from collection: {first_innings_team}")
-
-            # Match team innings to Team1 or Team2
-            if team_innings == match_team1 or match_team1.find(team_innings) >= 0 or team_innings.find(match_team1) >= 0:
-                team1_batting.append(stat)
-            elif team_innings == match_team2 or match_team2.find(team_innings) >= 0 or team_innings.find(match_team2) >= 0:
-                team2_batting.append(stat)
-
-        # Group bowling stats by team
-        team1_bowling = []
-        team2_bowling = []
-
-        for stat in bowling_stats:
-            bowler_name = stat.get('Bowler_Name', '')
-            # Find player's team from players collection
-            player = players_collection.find_one({'player_name': bowler_name}, {'team_name': 1, '_id': 0})
-
-            if player:
-                team_name = player.get('team_name', '').strip()
-
-                # Match to Team1 or Team2
-                if team_name == match_team1 or match_team1.find(team_name) >= 0 or team_name.find(match_team1) >= 0:
-                    team1_bowling.append(stat)
-                elif team_name == match_team2 or match_team2.find(team_name) >= 0 or team_name.find(match_team2) >= 0:
-                    team2_bowling.append(stat)
-
-        print(f"Found {len(team1_batting)} batting, {len(team1_bowling)} bowling for Team1")
-        print(f"Found {len(team2_batting)} batting, {len(team2_bowling)} bowling for Team2")
-
-        # Determine innings order based on which team appeared first in collection
-        # Check if first_innings_team matches Team2 (needs swap)
-        team2_batted_first = False
-        if first_innings_team:
-            team2_batted_first = (
-                first_innings_team == match_team2 or
-                match_team2.find(first_innings_team) >= 0 or
-                first_innings_team.find(match_team2) >= 0
-            )
+        ).sort('6s', -1).limit(30)
+        categories.append((list(big_hitters), _big_hitting_moment))
 
-        if team2_batted_first:
-            # Swap teams so first innings is shown first
-            print("Swapping team order - Team2 batted first")
-            return jsonify({
-                'match': match,
-                'team1_batting': team2_batting,  # First innings
-                'team2_batting': team1_batting,  # Second innings
-                'team1_bowling': team2_bowling,
-                'team2_bowling': team1_bowling,
-                'team1_name': match_team2,  # Actual team name for first innings
-                'team2_name': match_team1   # Actual team name for second innings
-            })
-        else:
-            return jsonify({
-                'match': match,
-                'team1_batting': team1_batting,
-                'team2_batting': team2_batting,
-                'team1_bowling': team1_bowling,
-                'team2_bowling': team2_bowling,
-                'team1_name': match_team1,
-                'team2_name': match_team2
-            })
-    except Exception as e:
-        print(f"Error fetching match scorecard: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    # ECONOMICAL BOWLING (Best economy rates for 4+ overs)
+    if moment_type in ['all', 'economy']:
+        economical = bowling_collection.find(
+            {'Overs': {'$gte': 4}, 'Economy': {'$gt': 0}},
+            {'_id': 0}
+        ).sort('Economy', 1).limit(20)
+        categories.append((list(economical), _economical_moment))
+
+    # EXPLOSIVE INNINGS (Strike rate > 150 for 30+ runs)
+    if moment_type in ['all', 'explosive']:
+        explosive = batting_collection.find(
+            {'Runs': {'$gte': 30}, 'Strike_Rate': {'$gte': 150}},
+            {'_id': 0}
+        ).sort('Strike_Rate', -1).limit(25)
+        categories.append((list(explosive), _explosive_moment))
+
+    # Resolve venues for every referenced match in a single query
+    match_numbers = {row['Match_no'] for rows, _ in categories for row in rows}
+    venues = {}
+    if match_numbers:
+        for match in matches_collection.find(
+            {'Match_no': {'$in': sorted(match_numbers)}},
+            {'_id': 0, 'Match_no': 1, 'Venue': 1}
+        ):
+            venues[match['Match_no']] = match.get('Venue', 'Unknown')
+
+    moments = []
+    for rows, make_moment in categories:
+        for row in rows:
+            moments.append(make_moment(row, venues.get(row['Match_no'], 'Unknown')))
+    return moments
 
 @app.route('/api/best-moments')
 def get_best_moments():
@@ -612,312 +936,345 @@ def get_best_moments():
     try:
         moment_type = request.args.get('type', 'all')
 
-        moments = []
-
-        # CENTURIES (100+ runs)
-        if moment_type in ['all', 'centuries']:
-            centuries = list(batting_collection.find(
-                {'Runs': {'$gte': 100}},
-                {'_id': 0}
-            ).sort('Runs', -1))
-
-            for century in centuries:
-                match = matches_collection.find_one({'Match_no': century['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'century',
-                    'title': f"{century['Batsman_Name']} - Magnificent {century['Runs']}",
-                    'description': f"Scored {century['Runs']} runs off {century['Balls']} balls with {century['4s']} fours and {century['6s']} sixes",
-                    'player': century['Batsman_Name'],
-                    'team': century['Team_Innings'],
-                    'match_no': century['Match_no'],
-                    'match': century.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'runs': century['Runs'],
-                    'balls': century['Balls'],
-                    'fours': century['4s'],
-                    'sixes': century['6s'],
-                    'strike_rate': century['Strike_Rate']
-                })
-
-        # HALF-CENTURIES (50-99 runs)
-        if moment_type in ['all', 'fifties']:
-            fifties = list(batting_collection.find(
-                {'Runs': {'$gte': 50, '$lt': 100}},
-                {'_id': 0}
-            ).sort('Runs', -1).limit(30))
-
-            for fifty in fifties:
-                match = matches_collection.find_one({'Match_no': fifty['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'fifty',
-                    'title': f"{fifty['Batsman_Name']} - Solid {fifty['Runs']}",
-                    'description': f"Scored {fifty['Runs']} runs off {fifty['Balls']} balls",
-                    'player': fifty['Batsman_Name'],
-                    'team': fifty['Team_Innings'],
-                    'match_no': fifty['Match_no'],
-                    'match': fifty.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'runs': fifty['Runs'],
-                    'balls': fifty['Balls'],
-                    'fours': fifty['4s'],
-                    'sixes': fifty['6s'],
-                    'strike_rate': fifty['Strike_Rate']
-                })
-
-        # 5-WICKET HAULS
-        if moment_type in ['all', 'wickets']:
-            five_wickets = list(bowling_collection.find(
-                {'Wickets': {'$gte': 5}},
-                {'_id': 0}
-            ).sort('Wickets', -1))
-
-            for performance in five_wickets:
-                match = matches_collection.find_one({'Match_no': performance['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'five_wickets',
-                    'title': f"{performance['Bowler_Name']} - Devastating {performance['Wickets']}-wicket haul",
-                    'description': f"Took {performance['Wickets']} wickets for {performance['Runs']} runs in {performance['Overs']} overs",
-                    'player': performance['Bowler_Name'],
-                    'team': performance['Bowling_Team'],
-                    'match_no': performance['Match_no'],
-                    'match': performance.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'wickets': performance['Wickets'],
-                    'runs': performance['Runs'],
-                    'overs': performance['Overs'],
-                    'economy': performance['Economy']
-                })
-
-        # 4-WICKET HAULS
-        if moment_type in ['all', 'wickets']:
-            four_wickets = list(bowling_collection.find(
-                {'Wickets': 4},
-                {'_id': 0}
-            ).sort('Runs', 1).limit(20))
-
-            for performance in four_wickets:
-                match = matches_collection.find_one({'Match_no': performance['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'four_wickets',
-                    'title': f"{performance['Bowler_Name']} - Brilliant {performance['Wickets']}-wicket spell",
-                    'description': f"Took {performance['Wickets']} wickets for {performance['Runs']} runs in {performance['Overs']} overs",
-                    'player': performance['Bowler_Name'],
-                    'team': performance['Bowling_Team'],
-                    'match_no': performance['Match_no'],
-                    'match': performance.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'wickets': performance['Wickets'],
-                    'runs': performance['Runs'],
-                    'overs': performance['Overs'],
-                    'economy': performance['Economy']
-                })
-
-        # BIG HITTING (Most sixes in an innings)
-        if moment_type in ['all', 'sixes']:
-            big_hitters = list(batting_collection.find(
-                {'6s': {'$gte': 3}},
-                {'_id': 0}
-            ).sort('6s', -1).limit(30))
-
-            for performance in big_hitters:
-                match = matches_collection.find_one({'Match_no': performance['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'big_hitting',
-                    'title': f"{performance['Batsman_Name']} - {performance['6s']} Massive Sixes!",
-                    'description': f"Smashed {performance['6s']} sixes while scoring {performance['Runs']} runs",
-                    'player': performance['Batsman_Name'],
-                    'team': performance['Team_Innings'],
-                    'match_no': performance['Match_no'],
-                    'match': performance.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'runs': performance['Runs'],
-                    'sixes': performance['6s'],
-                    'balls': performance['Balls'],
-                    'fours': performance.get('4s', 0),
-                    'strike_rate': performance.get('Strike_Rate', 0)
-                })
-
-        # ECONOMICAL BOWLING (Best economy rates for 4+ overs)
-        if moment_type in ['all', 'economy']:
-            economical = list(bowling_collection.find(
-                {'Overs': {'$gte': 4}, 'Economy': {'$gt': 0}},
-                {'_id': 0}
-            ).sort('Economy', 1).limit(20))
-
-            for performance in economical:
-                match = matches_collection.find_one({'Match_no': performance['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'economical',
-                    'title': f"{performance['Bowler_Name']} - Miserly {performance['Economy']} economy",
-                    'description': f"Conceded just {performance['Runs']} runs in {performance['Overs']} overs at {performance['Economy']} economy",
-                    'player': performance['Bowler_Name'],
-                    'team': performance['Bowling_Team'],
-                    'match_no': performance['Match_no'],
-                    'match': performance.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'wickets': performance['Wickets'],
-                    'runs': performance['Runs'],
-                    'overs': performance['Overs'],
-                    'economy': performance['Economy']
-                })
-
-        # EXPLOSIVE INNINGS (Strike rate > 150 for 30+ runs)
-        if moment_type in ['all', 'explosive']:
-            explosive = list(batting_collection.find(
-                {'Runs': {'$gte': 30}, 'Strike_Rate': {'$gte': 150}},
-                {'_id': 0}
-            ).sort('Strike_Rate', -1).limit(25))
-
-            for performance in explosive:
-                match = matches_collection.find_one({'Match_no': performance['Match_no']}, {'_id': 0})
-                moments.append({
-                    'type': 'explosive',
-                    'title': f"{performance['Batsman_Name']} - Explosive {performance['Strike_Rate']} SR",
-                    'description': f"Blitzed {performance['Runs']} runs off just {performance['Balls']} balls",
-                    'player': performance['Batsman_Name'],
-                    'team': performance['Team_Innings'],
-                    'match_no': performance['Match_no'],
-                    'match': performance.get('Match_Between', 'Unknown'),
-                    'venue': match['Venue'] if match else 'Unknown',
-                    'runs': performance['Runs'],
-                    'balls': performance['Balls'],
-                    'strike_rate': performance['Strike_Rate']
-                })
-
-        return jsonify({'moments': moments, 'total': len(moments)})
+        if moment_type not in MOMENT_TYPES:
+            return jsonify({'moments': [], 'total': 0})
+
+        def build():
+            moments = build_best_moments(moment_type)
+            return {'moments': moments, 'total': len(moments)}
+
+        return derived_json_response(
+            ('best_moments', moment_type),
+            (batting_collection, bowling_collection, matches_collection),
+            build
+        )
     except Exception as e:
-        print(f"Error fetching best moments: {str(e)}")
+        app.logger.exception('Error fetching best moments')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/head-to-head')
 def get_head_to_head():
     """Get head-to-head history between two teams"""
     try:
-        import csv
-
-        team1 = request.args.get('team1', '')
-        team2 = request.args.get('team2', '')
-        limit = int(request.args.get('limit', 10))
+        team1 = request.args.get('team1', '').strip()
+        team2 = request.args.get('team2', '').strip()
+        try:
+            limit = max(query_arg('limit', 10), 0)
+            offset = max(query_arg('offset', 0), 0)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         if not team1 or not team2:
             return jsonify({'error': 'Both team1 and team2 parameters are required'}), 400
 
-        # Load ODI matches data
-        csv_path = os.path.join(os.path.dirname(__file__), 'odi_Matches_Data.csv')
+        try:
+            date_from = parse_date_arg(request.args.get('from'))
+            date_to = parse_date_arg(request.args.get('to'))
+        except ValueError:
+            return jsonify({'error': 'from and to must be dates in YYYY-MM-DD format'}), 400
 
-        if not os.path.exists(csv_path):
+        try:
+            history = get_odi_history()
+        except FileNotFoundError:
             return jsonify({'error': 'ODI matches data file not found'}), 404
 
-        # Read CSV and filter matches
-        h2h_matches = []
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Filter matches between these two teams (both directions)
-                if ((row.get('Team1 Name') == team1 and row.get('Team2 Name') == team2) or
-                    (row.get('Team1 Name') == team2 and row.get('Team2 Name') == team1)):
-                    h2h_matches.append(row)
-
-        # Sort by date descending (most recent first)
-        def parse_date(row):
-            try:
-                from datetime import datetime
-                date_str = row.get('Match Date', '')
-                if date_str:
-                    return datetime.strptime(date_str, '%Y-%m-%d')
-                return datetime.min
-            except:
-                return datetime.min
-
-        h2h_matches.sort(key=parse_date, reverse=True)
-
-        # Limit to last N matches
-        h2h_matches = h2h_matches[:limit]
-
-        # Prepare response
-        matches = []
-        for row in h2h_matches:
-            try:
-                # Format date
-                match_date = 'Unknown'
-                if row.get('Match Date'):
-                    try:
-                        dt = datetime.strptime(row['Match Date'], '%Y-%m-%d')
-                        match_date = dt.strftime('%B %d, %Y')
-                    except:
-                        match_date = row['Match Date']
-
-                # Format scores
-                team1_score = 'N/A'
-                if row.get('Team1 Runs Scored') and row.get('Team1 Wickets Fell'):
-                    try:
-                        runs = float(row['Team1 Runs Scored'])
-                        wickets = float(row['Team1 Wickets Fell'])
-                        team1_score = f"{int(runs)}/{int(wickets)}"
-                    except:
-                        pass
-
-                team2_score = 'N/A'
-                if row.get('Team2 Runs Scored') and row.get('Team2 Wickets Fell'):
-                    try:
-                        runs = float(row['Team2 Runs Scored'])
-                        wickets = float(row['Team2 Wickets Fell'])
-                        team2_score = f"{int(runs)}/{int(wickets)}"
-                    except:
-                        pass
-
-                # Build venue string
-                venue = 'Unknown'
-                if row.get('Match Venue (Stadium)') and row.get('Match Venue (City)'):
-                    venue = f"{row['Match Venue (Stadium)']}, {row['Match Venue (City)']}"
-                elif row.get('Match Venue (Stadium)'):
-                    venue = row['Match Venue (Stadium)']
-
-                match_data = {
-                    'match_no': int(float(row.get('ODI Match No', 0))) if row.get('ODI Match No') else None,
-                    'match_name': row.get('Match Name', 'Unknown'),
-                    'series_name': row.get('Series Name', 'Unknown'),
-                    'match_date': match_date,
-                    'venue': venue,
-                    'team1': row.get('Team1 Name', 'Unknown'),
-                    'team1_score': team1_score,
-                    'team2': row.get('Team2 Name', 'Unknown'),
-                    'team2_score': team2_score,
-                    'winner': row.get('Match Winner', 'No Result'),
-                    'result': row.get('Match Result Text', 'No Result'),
-                    'mom': row.get('MOM Player', 'Unknown')
-                }
-                matches.append(match_data)
-            except Exception as e:
-                print(f"Error processing match row: {str(e)}")
+        summary, matches = history.head_to_head(
+            team1, team2,
+            date_from=date_from,
+            date_to=date_to,
+            offset=offset,
+            limit=limit
+        )
+
+        return jsonify({
+            'success': True,
+            'summary': summary,
+            'matches': matches,
+            'offset': offset,
+            'limit': limit
+        })
+
+    except Exception as e:
+        app.logger.exception('Error fetching head-to-head')
+        return jsonify({'error': str(e)}), 500
+
+def get_player_directory_ids():
+    """Directory lookups: name -> [player_id, ...] and player_id -> (name, image)"""
+    def build():
+        ids_by_name = {}
+        players_by_id = {}
+        for info in players_info_collection.find({}, {'_id': 0, 'player_name': 1, 'player_id': 1, 'image_url': 1}):
+            if info.get('player_id') is None:
                 continue
+            player_id = int(info['player_id'])
+            ids_by_name.setdefault(info.get('player_name'), []).append(player_id)
+            players_by_id.setdefault(player_id, (info.get('player_name'), info.get('image_url', '')))
+        return ids_by_name, players_by_id
+    return get_derived('player_directory_ids', (players_info_collection,), build)
+
+@app.route('/api/player/career')
+def get_player_career():
+    """Get a player's full ODI history and win rate from the Playing XI index"""
+    try:
+        player_id = request.args.get('id', '').strip()
+        player_name = request.args.get('name', '').strip()
+        try:
+            limit = max(query_arg('limit', 10), 0)
+            offset = max(query_arg('offset', 0), 0)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if not player_id and not player_name:
+            return jsonify({'error': 'Either id or name parameter is required'}), 400
+
+        try:
+            history = get_odi_history()
+        except FileNotFoundError:
+            return jsonify({'error': 'ODI matches data file not found'}), 404
 
-        # Calculate head-to-head summary
-        total_matches = len(matches)
-        team1_wins = sum(1 for m in matches if m['winner'] == team1)
-        team2_wins = sum(1 for m in matches if m['winner'] == team2)
-        no_results = total_matches - team1_wins - team2_wins
-
-        summary = {
-            'total_matches': total_matches,
-            'team1_wins': team1_wins,
-            'team2_wins': team2_wins,
-            'no_results': no_results,
-            'team1': team1,
-            'team2': team2
-        }
+        ids_by_name, players_by_id = get_player_directory_ids()
+        alternatives = []
+        if player_id:
+            if not player_id.isdigit():
+                return jsonify({'error': 'id must be a numeric player id'}), 400
+            player_id = int(player_id)
+        else:
+            player_ids = ids_by_name.get(player_name)
+            if not player_ids:
+                return jsonify({'error': f'Player not found: {player_name}'}), 404
+            # Some names are shared; the player with the longest ODI career wins
+            player_ids = sorted(player_ids, key=lambda candidate: -history.career_length(candidate))
+            player_id, alternatives = player_ids[0], player_ids[1:]
+        if player_id not in players_by_id and not history.career_length(player_id):
+            return jsonify({'error': f'Player not found: {player_id}'}), 404
+        player_name, image = players_by_id.get(player_id, (None, ''))
+
+        summary, matches = history.career(player_id, offset=offset, limit=limit)
 
         return jsonify({
             'success': True,
+            'player': {
+                'player_id': player_id,
+                'player_name': player_name,
+                'image': image,
+                'other_player_ids': alternatives
+            },
             'summary': summary,
-            'matches': matches
+            'matches': matches,
+            'offset': offset,
+            'limit': limit
         })
 
     except Exception as e:
-        print(f"Error fetching head-to-head: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception('Error fetching player career')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/odi')
+def get_odi_analytics():
+    """Aggregate historical ODI results by any combination of dimensions"""
+    try:
+        group_by = [dimension.strip() for dimension in request.args.get('group_by', '').split(',') if dimension.strip()]
+        filters = {
+            dimension: request.args[dimension].strip()
+            for dimension in ODI_DIMENSIONS
+            if dimension != 'year' and request.args.get(dimension, '').strip()
+        }
+        try:
+            year_from = int(request.args['from_year']) if request.args.get('from_year') else None
+            year_to = int(request.args['to_year']) if request.args.get('to_year') else None
+            if request.args.get('year'):
+                year_from = year_to = int(request.args['year'])
+        except ValueError:
+            return jsonify({'error': 'year, from_year and to_year must be years like 2015'}), 400
+        try:
+            min_matches = max(query_arg('min_matches', 0), 0)
+            limit = min(max(query_arg('limit', 50), 0), LIST_MAX_LIMIT)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        sort = request.args.get('sort', 'matches')
+
+        try:
+            cube = get_odi_cube()
+        except FileNotFoundError:
+            return jsonify({'error': 'ODI matches data file not found'}), 404
+
+        try:
+            total, groups, total_groups = cube.query(
+                group_by,
+                filters,
+                year_from=year_from,
+                year_to=year_to,
+                sort=sort,
+                min_matches=min_matches,
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'group_by': group_by,
+            'filters': filters,
+            'from_year': year_from,
+            'to_year': year_to,
+            'total': total,
+            'groups': groups,
+            'total_groups': total_groups
+        })
+
+    except Exception as e:
+        app.logger.exception('Error running ODI analytics')
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live')
+def get_live_feed():
+    """Stream new scorecard lines and leaderboard changes as Server-Sent Events
+
+    Query args: match_no limits innings events to one match. Reconnecting
+    clients send Last-Event-ID and receive the events they missed.
+    """
+    try:
+        match_no = request.args.get('match_no')
+        match_no = int(match_no) if match_no else None
+    except ValueError:
+        return jsonify({'error': 'match_no must be a match number'}), 400
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_id = int(last_event_id) if last_event_id.isdecimal() else None
+
+    try:
+        # Writes are only seen through a change stream, which needs a replica set
+        feed = live.get_feed(
+            {'batting': batting_collection, 'bowling': bowling_collection},
+            watch=database.backend() == 'mongo'
+        )
+    except Exception as e:
+        app.logger.exception('Error starting the live feed')
         return jsonify({'error': str(e)}), 500
 
+    response = Response(feed.stream(last_id, match_no), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    # Proxies must pass events through as they are written
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Export datasets: collection, CSV columns, sort order and filter argument -> field
+EXPORT_BATCH_SIZE = 1000
+EXPORT_DATASETS = {
+    'batting': {
+        'collection': batting_collection,
+        'fields': ['Match_no', 'Match_Between', 'Team_Innings', 'Batsman_Name', 'Batting_Position', 'Dismissal',
+                   'Runs', 'Balls', '4s', '6s', 'Strike_Rate'],
+        'sort': [('Match_no', 1), ('Batting_Position', 1), ('_id', 1)],
+        'filters': {'player': 'Batsman_Name', 'team': 'Team_Innings'}
+    },
+    'bowling': {
+        'collection': bowling_collection,
+        'fields': ['Match_no', 'Match_Between', 'Bowling_Team', 'Bowler_Name', 'Overs', 'Balls_Bowled', 'Maidens',
+                   'Runs', 'Wickets', 'Economy'],
+        'sort': [('Match_no', 1), ('Bowler_Name', 1), ('Bowling_Team', 1)],
+        'filters': {'player': 'Bowler_Name', 'team': 'Bowling_Team'}
+    },
+    'matches': {
+        'collection': matches_collection,
+        'fields': MATCH_FIELDS,
+        'sort': [('Match_no', 1)],
+        'filters': {}
+    }
+}
+ODI_EXPORT_FIELDS = ['match_no', 'match_name', 'series_name', 'match_date', 'venue', 'team1', 'team1_score',
+                     'team2', 'team2_score', 'winner', 'result', 'mom']
+
+def export_documents(dataset):
+    """Documents for an export, filtered by the request arguments, as a lazy iterable"""
+    if dataset == 'odi-history':
+        try:
+            date_from = parse_date_arg(request.args.get('from'))
+            date_to = parse_date_arg(request.args.get('to'))
+        except ValueError:
+            raise ValueError('from and to must be dates in YYYY-MM-DD format')
+        team = request.args.get('team', '').strip()
+        return get_odi_history().matches(team=team or None, date_from=date_from, date_to=date_to)
+
+    spec = EXPORT_DATASETS[dataset]
+    query = {}
+    for argument, field in spec['filters'].items():
+        if request.args.get(argument):
+            query[field] = request.args[argument].strip()
+    match_no = query_arg('match_no')
+    if match_no is not None:
+        query['Match_no'] = match_no
+    if dataset == 'matches':
+        if request.args.get('team'):
+            spellings = team_spellings(request.args['team'])
+            query['$or'] = [
+                {'Team1': {'$in': spellings}},
+                {'Team2': {'$in': spellings}}
+            ]
+        if request.args.get('venue'):
+            query['Venue'] = {'$in': matching_venues(request.args['venue'])}
+
+    projection = {field: 1 for field in spec['fields']}
+    projection['_id'] = 0
+    return spec['collection'].find(query, projection).sort(spec['sort']).batch_size(EXPORT_BATCH_SIZE)
+
+@app.route('/api/export/<dataset>')
+def export_dataset(dataset):
+    """Stream a whole dataset as NDJSON or CSV"""
+    try:
+        if dataset not in EXPORT_DATASETS and dataset != 'odi-history':
+            return jsonify({'error': f"Unknown dataset '{dataset}'. Use one of: {', '.join(list(EXPORT_DATASETS) + ['odi-history'])}"}), 404
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in exports.EXPORT_FORMATS:
+            return jsonify({'error': f"Unknown format '{export_format}'. Use ndjson or csv"}), 400
+
+        try:
+            documents = exports.start(export_documents(dataset))
+        except FileNotFoundError:
+            return jsonify({'error': 'ODI matches data file not found'}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        fields = ODI_EXPORT_FIELDS if dataset == 'odi-history' else EXPORT_DATASETS[dataset]['fields']
+        response = Response(
+            exports.encode(documents, export_format, fields),
+            mimetype=exports.EXPORT_FORMATS[export_format]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+        return response
+
+    except Exception as e:
+        app.logger.exception('Error exporting %s', dataset)
+        return jsonify({'error': str(e)}), 500
+
+# Pre-fork deployment
+# wsgi.py builds the read-only data below once in the gunicorn master, so the
+# workers forked from it share one copy; each worker then drops the
+# per-process state it inherited (see gunicorn.conf.py).
+PRELOADED_DATA = [
+    ('ODI history', get_odi_history),
+    ('ODI analytics cube', get_odi_cube),
+    ('player directory', get_player_directory_ids),
+    ('match lookup', get_match_lookup),
+    ('search vocabulary', get_search_planner),
+    ('typeahead trie', lambda: get_derived('suggest_trie', (players_collection, matches_collection), build_suggest_trie)),
+    ('batting leaderboard', get_batting_leaderboard),
+    ('bowling leaderboard', get_bowling_leaderboard),
+]
+
+def preload_shared_data():
+    """Build the shared read-only data now; anything that fails is built by the first request needing it"""
+    for name, load in PRELOADED_DATA:
+        try:
+            load()
+        except Exception as e:
+            app.logger.warning('Could not preload the %s: %s', name, e)
+
+def reset_after_fork():
+    """Drop the database client, query pool, live feed, response cache and metrics a worker inherited"""
+    database.reset_after_fork()
+    live.reset_after_fork()
+    response_cache.reset_after_fork()
+    metrics.reset_after_fork()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""Cold-start benchmark: app import time plus first-request latency
+
+Usage: python benchmarks/cold_start.py [--runs N] [--url /api/stats/overview]
+
+Each run starts a fresh interpreter, the way a serverless instance does,
+imports app.py and sends two requests through the Flask test client. The
+first request pays for connecting to MongoDB and building any cached data;
+the second shows the warm latency for comparison. MONGO_URI is taken from
+the environment or .env as usual.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+
+test_client = app.app.test_client()
+status = test_client.get(sys.argv[1]).status_code
+first = time.perf_counter()
+test_client.get(sys.argv[1])
+second = time.perf_counter()
+
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first - imported) * 1000,
+    'warm_request_ms': (second - first) * 1000,
+    'status': status
+}))
+'''
+
+
+def run_once(url):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE, url], cwd=ROOT, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f'Probe failed:\n{result.stderr}')
+    # The app may log before the probe prints its result
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = process_ms
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--url', default='/api/stats/overview')
+    args = parser.parse_args()
+
+    runs = [run_once(args.url) for _ in range(args.runs)]
+    statuses = sorted({run['status'] for run in runs})
+
+    print(f'{args.url}: {args.runs} cold starts, status {", ".join(map(str, statuses))}')
+    for key, label in [('import_ms', 'import app'), ('first_request_ms', 'first request'),
+                       ('warm_request_ms', 'warm request'), ('process_ms', 'whole process')]:
+        values = [run[key] for run in runs]
+        print(f'  {label:14}: median {statistics.median(values):8.1f} ms  '
+              f'(min {min(values):.1f}, max {max(values):.1f})')
+
+
+if __name__ == '__main__':
+    main()
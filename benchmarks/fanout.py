@@ -0,0 +1,96 @@
+"""Benchmark: concurrent query fan-out for the multi-query routes
+
+Usage: python benchmarks/fanout.py [--uri mongodb://localhost:27017] [--repeat N]
+
+Needs a MongoDB with the tournament data loaded (python ingest.py). Each
+route is timed with its queries issued one after another (QUERY_FANOUT off)
+and concurrently, next to the client-side duration of every query it sends,
+so the concurrent latency can be compared with the sum of the queries and
+with the slowest one. The response cache is turned off
+(RESPONSE_CACHE_SIZE=0) so every timed request runs its queries.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+from pymongo import monitoring
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+URLS = [
+    '/api/stats/overview',
+    '/api/player/performance/Virat%20Kohli',
+    '/api/player/performance/Jasprit%20Bumrah',
+]
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Collect the duration of every command that succeeds"""
+
+    def __init__(self):
+        self.durations = []
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.durations.append(event.duration_micros / 1000)
+
+    def failed(self, event):
+        pass
+
+
+def time_requests(test_client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = test_client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f'{url} returned {response.status_code}: {response.get_data(as_text=True)}')
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    # The listener must exist before the client, which app creates lazily
+    os.environ['MONGO_URI'] = args.uri
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    timer = CommandTimer()
+    monitoring.register(timer)
+
+    import app
+    import database
+
+    test_client = app.app.test_client()
+    for url in URLS:
+        # Warm the connection pool, the query threads and the cached schedule
+        time_requests(test_client, url, 5)
+
+        database.QUERY_FANOUT = False
+        timer.durations = []
+        time_requests(test_client, url, 1)
+        queries = list(timer.durations)
+        sequential_ms = time_requests(test_client, url, args.repeat)
+
+        database.QUERY_FANOUT = True
+        concurrent_ms = time_requests(test_client, url, args.repeat)
+
+        print(f'{url}: {len(queries)} queries, '
+              f'sum {sum(queries):.2f} ms, slowest {max(queries, default=0):.2f} ms')
+        print(f'  sequential : {sequential_ms:8.2f} ms/request')
+        print(f'  concurrent : {concurrent_ms:8.2f} ms/request  ({sequential_ms / concurrent_ms:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
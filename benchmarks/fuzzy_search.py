@@ -0,0 +1,68 @@
+"""Micro-benchmark: NameIndex.search against the brute-force fuzzy_match
+
+Usage: python benchmarks/fuzzy_search.py [--repeat N]
+
+Runs a fixed set of exact, partial and misspelt queries against the World
+Cup squad names and the full players_info.csv directory, checks that both
+implementations return identical rankings and prints per-query timings.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from name_index import NameIndex, fuzzy_match  # noqa: E402
+
+QUERIES = [
+    'virat', 'viart', 'kohli', 'khoil', 'rohit sharma', 'rohitsharma', 'maxwel',
+    'glen maxwell', 'bumrah', 'bumra', 'starc', 'warner', 'de kock', 'dekok',
+    'shami', 'rashid', 'babar azam', 'babr', 'smith', 'williamson', 'wiliamson',
+    'sachin', 'tendulkr', 'ab', 'jos', 'zampa'
+]
+
+
+def load_names(filename):
+    with open(os.path.join(ROOT, filename), encoding='utf-8') as f:
+        return [row['player_name'] for row in csv.DictReader(f)]
+
+
+def time_per_query(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for label, filename in [('World Cup squads', 'world_cup_players_info.csv'),
+                            ('players_info.csv', 'players_info.csv')]:
+        names = load_names(filename)
+
+        start = time.perf_counter()
+        index = NameIndex(names)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for query in QUERIES:
+            threshold = 1 if len(query) <= 4 else 2
+            if index.search(query, threshold) != fuzzy_match(query, names, threshold):
+                raise SystemExit(f'Result mismatch for {query!r} on {label}')
+
+        brute_ms = time_per_query(lambda q: fuzzy_match(q, names, 1 if len(q) <= 4 else 2), args.repeat)
+        indexed_ms = time_per_query(lambda q: index.search(q, 1 if len(q) <= 4 else 2), args.repeat)
+
+        print(f'{label}: {len(names)} names, index built in {build_ms:.1f} ms')
+        print(f'  brute force : {brute_ms:8.3f} ms/query')
+        print(f'  NameIndex   : {indexed_ms:8.3f} ms/query  ({brute_ms / indexed_ms:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Load benchmark: latency percentiles, throughput and queries per request for every route
+
+Usage: python benchmarks/load.py [--uri mongodb://localhost:27017 [--seed]]
+                                 [--concurrency 8] [--requests 200]
+                                 [--save-baseline | --check] [--baseline FILE]
+
+The app is served by a threaded local HTTP server and every URL below is
+requested --requests times from --concurrency client threads, after one
+warm-up request. Without --uri the in-memory backend (the bundled CSVs) is
+the stand-in database; with --uri the app talks to that MongoDB, and --seed
+first loads the bundled CSVs into it with ingest.py (replacing the 'hello'
+database). MongoDB commands per request come from the /metrics command
+listener, so they are only reported against a real MongoDB. The response
+cache is turned off (RESPONSE_CACHE_SIZE=0), since the warm-up request would
+otherwise make every timed request a cache hit; the derived data caches stay
+on, as in production.
+
+--save-baseline writes the results to the baseline file. --check compares
+against it and exits with status 1 when a route's p95 latency grew by more
+than --max-regression (plus --slack-ms, to absorb noise on fast routes) or
+when it issues more MongoDB commands per request than before. Baselines are
+specific to the machine and backend they were recorded on.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+URLS = [
+    '/api/stats/overview',
+    '/api/players',
+    '/api/players?team=India',
+    '/api/teams',
+    '/api/venues',
+    '/api/matches',
+    '/api/matches?team=India',
+    '/api/bootstrap',
+    '/api/batting/top',
+    '/api/bowling/top',
+    '/api/search?q=virat',
+    '/api/search?q=viart%20kohli',
+    '/api/search?q=englnd',
+    '/api/search?q=bumrah%20wickets',
+    '/api/search?q=top%205%20bowlers%20under%205%20economy%20in%20chennai',
+    '/api/suggest?q=vir',
+    '/api/player/performance/Virat%20Kohli',
+    '/api/player/performance/Jasprit%20Bumrah',
+    '/api/match/scorecard/1',
+    '/api/best-moments',
+    '/api/head-to-head?team1=India&team2=Australia',
+    '/api/player/career?name=Virat%20Kohli',
+    '/api/analytics/odi?group_by=country&toss=won',
+    '/api/export/batting?format=csv',
+]
+
+
+def fetch(port, url):
+    """Request one URL and return its latency in milliseconds"""
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        connection.request('GET', url, headers={'Accept-Encoding': 'gzip'})
+        response = connection.getresponse()
+        response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise SystemExit(f'{url} returned {response.status}')
+    return (time.perf_counter() - start) * 1000
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(port, url, requests, concurrency, route, metrics):
+    fetch(port, url)
+    commands_before = metrics.COMMANDS_PER_REQUEST.total(route)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        latencies = sorted(pool.map(lambda _: fetch(port, url), range(requests)))
+        elapsed = time.perf_counter() - start
+
+    commands, count = (after - before for after, before in
+                       zip(metrics.COMMANDS_PER_REQUEST.total(route), commands_before))
+    return {
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'requests_per_second': round(requests / elapsed, 1),
+        'queries_per_request': round(commands / count, 2) if count else 0
+    }
+
+
+def compare(results, baseline, max_regression, slack_ms):
+    """Regression messages for routes slower, or issuing more queries, than the baseline"""
+    failures = []
+    for url, result in results.items():
+        previous = baseline.get('routes', {}).get(url)
+        if previous is None:
+            continue
+        allowed = previous['p95_ms'] * (1 + max_regression) + slack_ms
+        if result['p95_ms'] > allowed:
+            failures.append(f"{url}: p95 {result['p95_ms']:.2f} ms, baseline {previous['p95_ms']:.2f} ms "
+                            f"(allowed {allowed:.2f} ms)")
+        if result['queries_per_request'] > previous['queries_per_request'] + 0.01:
+            failures.append(f"{url}: {result['queries_per_request']} queries per request, "
+                            f"baseline {previous['queries_per_request']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', help='MongoDB to benchmark against; the in-memory backend when omitted')
+    parser.add_argument('--seed', action='store_true', help="load the bundled CSVs into --uri first")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per URL')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='allowed relative p95 growth')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='allowed absolute p95 growth')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.check:
+        # Read before the run, so a missing baseline fails fast
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            raise SystemExit(f'no baseline at {args.baseline}; record one with --save-baseline')
+
+    if args.uri:
+        os.environ['MONGO_URI'] = args.uri
+        os.environ['DATA_BACKEND'] = 'mongo'
+    else:
+        os.environ['DATA_BACKEND'] = 'memory'
+    os.environ['RESPONSE_CACHE_SIZE'] = '0'
+
+    import app
+    import database
+    import metrics
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    if args.seed:
+        if not args.uri:
+            raise SystemExit('--seed needs --uri')
+        import ingest
+        ingest.ingest(database.get_db())
+
+    app.app.logger.disabled = True
+    server = make_server('127.0.0.1', 0, app.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    adapter = app.app.url_map.bind('localhost')
+
+    backend = database.backend()
+    print(f'backend {backend}, {args.requests} requests per URL at concurrency {args.concurrency}')
+    print(f"{'url':48} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8}")
+
+    results = {}
+    try:
+        for url in URLS:
+            rule, _ = adapter.match(url.split('?')[0], return_rule=True)
+            result = measure(server.port, url, args.requests, args.concurrency, rule.rule, metrics)
+            results[url] = result
+            queries = f"{result['queries_per_request']:8.2f}" if backend == 'mongo' else f"{'-':>8}"
+            print(f"{url[:48]:48} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+                  f"{result['requests_per_second']:8.1f} {queries}")
+    finally:
+        server.shutdown()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'backend': backend,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'python': platform.python_version(),
+                'routes': results
+            }, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+
+    if args.check:
+        if baseline.get('backend') != backend or baseline.get('concurrency') != args.concurrency:
+            raise SystemExit(f"Baseline was recorded with backend {baseline.get('backend')} at concurrency "
+                             f"{baseline.get('concurrency')}; re-record it or match those settings")
+        failures = compare(results, baseline, args.max_regression, args.slack_ms)
+        if failures:
+            print('Regressions against the baseline:')
+            for failure in failures:
+                print(f'  {failure}')
+            raise SystemExit(1)
+        print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
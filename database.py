@@ -0,0 +1,197 @@
+"""Lazily created database client for serverless and pre-forked deployments
+
+Nothing here touches the network at import time. The client is created on
+first use with an explicit pool size and timeouts, so a cold start only pays
+for the connection when a request actually needs the database, and an
+unreachable server fails that request instead of the import.
+
+Two backends are available, chosen by DATA_BACKEND: 'mongo' and 'memory',
+which serves the bundled CSVs in-process (see memstore.py). Without
+DATA_BACKEND, MongoDB is used when MONGO_URI is set and memory otherwise.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+DB_NAME = 'hello'
+
+# Routes with several independent reads issue them together on a small
+# thread pool, so their latency approaches the slowest read instead of the
+# sum; QUERY_FANOUT=0 runs them one after another
+QUERY_FANOUT = os.getenv('QUERY_FANOUT', '1') != '0'
+QUERY_POOL_SIZE = int(os.getenv('QUERY_POOL_SIZE', 8))
+
+log = logging.getLogger(__name__)
+
+_client = None
+_backend = None
+_client_lock = threading.Lock()
+_query_pool = None
+_query_pool_lock = threading.Lock()
+
+
+def client_options():
+    """Pool size and timeouts, read from the environment when the client is created
+
+    Each serverless instance serves one request at a time, so a small pool is
+    enough; the timeouts keep an unreachable server from hanging a request.
+    """
+    return {
+        'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', 10)),
+        'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+        'maxIdleTimeMS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000)),
+        'serverSelectionTimeoutMS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        'connectTimeoutMS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+        'socketTimeoutMS': int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 20000)),
+        'appname': 'odiwc2023'
+    }
+
+
+def backend():
+    """The configured backend, 'mongo' or 'memory'"""
+    configured = os.getenv('DATA_BACKEND')
+    if configured:
+        if configured not in ('mongo', 'memory'):
+            raise ValueError(f"Unknown DATA_BACKEND '{configured}'. Use 'mongo' or 'memory'")
+        return configured
+    return 'mongo' if os.getenv('MONGO_URI') else 'memory'
+
+
+def get_client():
+    """Return the process-wide client, creating it on first use"""
+    global _client, _backend
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                selected = backend()
+                if selected == 'memory':
+                    from memstore import MemoryClient
+                    log.info('Serving the bundled CSVs from memory')
+                    _client = MemoryClient()
+                else:
+                    uri = os.getenv('MONGO_URI')
+                    if not uri:
+                        raise RuntimeError('MONGO_URI is not set. Add it to the .env file or the environment')
+                    log.info('Connecting to MongoDB with URI: %s...', uri[:uri.find('@')])
+                    _client = MongoClient(uri, **client_options())
+                _backend = selected
+    return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def get_query_pool():
+    """Return the process-wide query thread pool, creating it on first use"""
+    global _query_pool
+    if _query_pool is None:
+        with _query_pool_lock:
+            if _query_pool is None:
+                _query_pool = ThreadPoolExecutor(max_workers=QUERY_POOL_SIZE, thread_name_prefix='mongo-query')
+    return _query_pool
+
+
+def close_for_fork():
+    """Close the MongoDB client and query pool before a pre-forking server starts its workers
+
+    The memory backend's tables are kept, so workers share them copy-on-write.
+    """
+    global _client, _backend, _query_pool
+    with _client_lock:
+        if _backend == 'mongo':
+            _client.close()
+            _client = None
+            _backend = None
+    with _query_pool_lock:
+        if _query_pool is not None:
+            _query_pool.shutdown(wait=True)
+            _query_pool = None
+
+
+def reset_after_fork():
+    """Forget the MongoDB client and query pool a forked worker inherited
+
+    A MongoClient is not fork-safe and pool threads do not survive a fork,
+    so the worker opens its own on first use. The inherited client is
+    dropped, not closed, since its sockets still belong to the parent.
+    """
+    global _client, _backend, _client_lock, _query_pool, _query_pool_lock
+    _client_lock = threading.Lock()
+    _query_pool_lock = threading.Lock()
+    _query_pool = None
+    if _backend == 'mongo':
+        _client = None
+        _backend = None
+
+
+def run_concurrently(*calls):
+    """Run independent zero-argument calls concurrently and return their results in order"""
+    # In-memory reads are CPU-bound, so threads would only add overhead
+    if not QUERY_FANOUT or len(calls) < 2 or _backend == 'memory':
+        return [call() for call in calls]
+
+    # The first call runs on the request thread while the rest are pooled,
+    # each in a copy of the request's context so metrics know the route
+    futures = [get_query_pool().submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
+
+
+class LazyClient:
+    """Stands in for the MongoClient until it is first used"""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+    def __getitem__(self, name):
+        return get_client()[name]
+
+
+class LazyDatabase:
+    """Stands in for the application database until it is first used"""
+
+    name = DB_NAME
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+class LazyCollection:
+    """Stands in for a collection; its name is known without connecting"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, name):
+        return getattr(get_db()[self.name], name)
+
+
+def health():
+    """Connection diagnostics: backend, ping latency, server version and collections"""
+    started = time.perf_counter()
+    get_client().admin.command('ping')
+    ping_ms = (time.perf_counter() - started) * 1000
+    diagnostics = {
+        'backend': _backend,
+        'database': DB_NAME,
+        'ping_ms': round(ping_ms, 2),
+        'server_version': get_client().server_info().get('version'),
+        'collections': sorted(get_db().list_collection_names())
+    }
+    if _backend == 'mongo':
+        options = client_options()
+        diagnostics['pool'] = {
+            'max_size': options['maxPoolSize'],
+            'min_size': options['minPoolSize'],
+            'server_selection_timeout_ms': options['serverSelectionTimeoutMS']
+        }
+    return diagnostics
@@ -0,0 +1,68 @@
+"""Streaming NDJSON and CSV encoders for the export endpoints
+
+Documents are pulled one at a time from a cursor or generator and written
+out in chunks of ROWS_PER_CHUNK rows, so an export holds at most one chunk
+in memory and the first bytes leave before the whole result is read.
+"""
+import csv
+import io
+import itertools
+
+import json_provider
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+ROWS_PER_CHUNK = 500
+
+
+def start(documents):
+    """Read the first document now, so a failing query is reported before the response starts"""
+    documents = iter(documents)
+    first = next(documents, None)
+    if first is None:
+        return iter(())
+    return itertools.chain([first], documents)
+
+
+def ndjson_chunks(documents):
+    """One JSON object per line"""
+    lines = []
+    for document in documents:
+        lines.append(json_provider.dumps(document, sort_keys=False).decode('utf-8'))
+        if len(lines) == ROWS_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def csv_chunks(documents, fields=None):
+    """A header row and one row per document; columns come from the first document unless given"""
+    buffer = io.StringIO()
+    writer = None
+    rows = 0
+    for document in documents:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=fields or list(document), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(document)
+        rows += 1
+        if rows == ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if writer is None and fields:
+        csv.DictWriter(buffer, fieldnames=fields).writeheader()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode(documents, export_format, fields=None):
+    """Chunks of the documents in the given format"""
+    if export_format == 'csv':
+        return csv_chunks(documents, fields)
+    return ndjson_chunks(documents)
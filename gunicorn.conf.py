@@ -0,0 +1,32 @@
+"""gunicorn settings for the pre-fork deployment
+
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY worker processes (default: one per core) each run
+GUNICORN_THREADS request threads. Requests are mostly CPU-bound Python, so
+throughput scales with processes; the threads cover time spent waiting on
+MongoDB. /api/live holds a connection open per subscriber, so deployments
+with many subscribers should use an async worker class instead
+(GUNICORN_WORKER_CLASS=gevent, with gevent installed).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Load the app, and its shared data, once in the master before forking
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Give each worker its own MongoDB client, query pool, caches and metrics"""
+    from app import reset_after_fork
+    reset_after_fork()
@@ -0,0 +1,120 @@
+"""Conditional GET, cache lifetimes and compression for the JSON API
+
+The tournament data only changes when it is re-ingested, so an API response
+is fully determined by the code, the request URL and the data versions kept
+in the meta collection. The ETag is computed from exactly those, before the
+view runs, which lets a revalidation be answered with 304 without building
+the body at all.
+"""
+import gzip
+import hashlib
+import os
+from urllib.parse import urlencode
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it every client that accepts gzip gets gzip
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/csv', 'text/plain', 'application/x-ndjson'}
+
+# Browsers revalidate after max-age (a cheap 304); the CDN keeps responses
+# longer and refreshes them in the background
+DEFAULT_CACHE_CONTROL = 'public, max-age=60, s-maxage=600, stale-while-revalidate=86400'
+
+# endpoint -> Cache-Control, None for endpoints that must never be cached
+CACHE_CONTROL = {
+    # Typeahead repeats the same prefixes constantly
+    'get_suggestions': 'public, max-age=300, s-maxage=3600, stale-while-revalidate=86400',
+    # Served from the bundled ODI history CSV, which only changes with a deploy
+    'get_head_to_head': 'public, max-age=86400, s-maxage=86400',
+    'get_odi_analytics': 'public, max-age=86400, s-maxage=86400',
+    # Live connection diagnostics
+    'get_health': None,
+    # Server-Sent Events
+    'get_live_feed': None,
+}
+
+
+def source_version(directory=None):
+    """Identify the deployed code, so a deploy invalidates every ETag"""
+    commit = os.getenv('VERCEL_GIT_COMMIT_SHA')
+    if commit:
+        return commit
+
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(name.encode('utf-8'))
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def normalized_url(path, args):
+    """The path and query arguments in a canonical order
+
+    Arguments are ordered by name only; empty values and the order of a
+    repeated argument's values are kept, since views can answer them
+    differently. Requests that differ only in the order of distinct
+    arguments get the same ETag and share one response cache entry.
+    """
+    arguments = sorted(args.items(multi=True), key=lambda item: item[0])
+    return f'{path}?{urlencode(arguments)}' if arguments else path
+
+
+def response_etag(code_version, data_versions, url):
+    """ETag for a GET of url against the given code and data versions"""
+    digest = hashlib.sha1(code_version.encode('utf-8'))
+    for name, version in sorted(data_versions.items()):
+        digest.update(f"\0{name}={version}".encode('utf-8'))
+    digest.update(f"\0{url}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def cache_control(endpoint):
+    """Cache-Control value for an endpoint, or None if it must not be cached"""
+    return CACHE_CONTROL.get(endpoint, DEFAULT_CACHE_CONTROL)
+
+
+def choose_encoding(accept_encodings):
+    """Pick brotli or gzip from a parsed Accept-Encoding header, or None"""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response, accept_encodings):
+    """Compress a buffered response in place when the client accepts it and it is large enough"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # A strong ETag names the exact bytes, which compression changes
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
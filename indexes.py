@@ -0,0 +1,251 @@
+"""MongoDB index declarations and query-plan audit for the API
+
+Usage:
+    python indexes.py create    create every declared index
+    python indexes.py audit     create the indexes, call every API route and
+                                explain each query it sends to MongoDB
+
+The audit captures the real commands issued by the routes with a pymongo
+CommandListener, so it always checks the query shapes the code currently
+sends. It reports collection scans on filtered queries and in-memory
+sorts, and exits with status 1 if it finds any.
+"""
+import argparse
+import sys
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, monitoring
+
+# collection -> indexes, each commented with the queries it serves
+INDEXES = {
+    'matchScheduleResultsODIWC2023': [
+        # scorecard lookup, best-moments venue lookup, schedule order
+        IndexModel([('Match_no', ASCENDING)], name='unique_row', unique=True),
+        # /api/matches and search team filters, returned in schedule order
+        IndexModel([('Team1', ASCENDING), ('Match_no', ASCENDING)], name='team1_match'),
+        IndexModel([('Team2', ASCENDING), ('Match_no', ASCENDING)], name='team2_match'),
+        # /api/matches venue filter
+        IndexModel([('Venue', ASCENDING), ('Match_no', ASCENDING)], name='venue_match'),
+    ],
+    'battingODIWC2023': [
+        IndexModel([('Match_no', ASCENDING), ('Batsman_Name', ASCENDING), ('Team_Innings', ASCENDING)],
+                   name='unique_row', unique=True),
+        # scorecard: one match in batting order
+        IndexModel([('Match_no', ASCENDING), ('Batting_Position', ASCENDING), ('_id', ASCENDING)],
+                   name='match_batting_order'),
+        # player performance and search totals
+        IndexModel([('Batsman_Name', ASCENDING), ('Match_no', ASCENDING)], name='batsman_matches'),
+        # best moments: centuries, fifties, explosive innings, big hitting
+        IndexModel([('Runs', DESCENDING)], name='runs'),
+        IndexModel([('Strike_Rate', DESCENDING)], name='strike_rate'),
+        IndexModel([('6s', DESCENDING)], name='sixes'),
+    ],
+    'bowlingODIWC2023': [
+        # also serves the scorecard: one match ordered by bowler
+        IndexModel([('Match_no', ASCENDING), ('Bowler_Name', ASCENDING), ('Bowling_Team', ASCENDING)],
+                   name='unique_row', unique=True),
+        # player performance and search totals
+        IndexModel([('Bowler_Name', ASCENDING), ('Match_no', ASCENDING)], name='bowler_matches'),
+        # best moments: wicket hauls (by wickets, then runs) and economy
+        IndexModel([('Wickets', DESCENDING), ('Runs', ASCENDING)], name='wickets_runs'),
+        IndexModel([('Economy', ASCENDING)], name='economy'),
+    ],
+    'WCPlayersInfoODIWC2023': [
+        # player modal, search by matched names
+        IndexModel([('player_name', ASCENDING)], name='unique_row', unique=True),
+        # /api/players filters and team search, in player_name (cursor) order
+        IndexModel([('team_name', ASCENDING), ('player_name', ASCENDING)], name='team_players'),
+        IndexModel([('playingRole', ASCENDING), ('player_name', ASCENDING)], name='role_players'),
+    ],
+    'ODIplayers_info': [
+        IndexModel([('player_id', ASCENDING)], name='unique_row', unique=True),
+        # player image lookup
+        IndexModel([('player_name', ASCENDING)], name='player_name'),
+    ],
+    'playerProfilesODIWC2023': [
+        # player modal: one keyed read per profile
+        IndexModel([('player_name', ASCENDING)], name='unique_row', unique=True),
+    ],
+}
+
+# One or more requests per API route; the audit explains everything they query
+AUDIT_URLS = [
+    '/api/stats/overview',
+    '/api/players',
+    '/api/players?team=India&role=Batter',
+    '/api/players?search=sharma',
+    '/api/players?limit=20&after=Babar%20Azam',
+    '/api/matches?team=India&limit=5&after=9',
+    '/api/teams',
+    '/api/venues',
+    '/api/matches',
+    '/api/matches?team=India',
+    '/api/matches?venue=Pune',
+    '/api/batting/top',
+    '/api/bowling/top',
+    '/api/search?q=virat',
+    '/api/search?q=kohli runs',
+    '/api/search?q=bumrah wickets',
+    '/api/search?q=top bowler',
+    '/api/search?q=englnd',
+    '/api/suggest?q=vir',
+    '/api/player/performance/Virat%20Kohli',
+    '/api/match/scorecard/1',
+    '/api/best-moments',
+    '/api/head-to-head?team1=India&team2=Australia',
+    '/api/player/career?name=Virat%20Kohli',
+    '/api/analytics/odi?group_by=country&toss=won',
+    '/api/export/batting',
+    '/api/export/bowling?player=Jasprit%20Bumrah',
+    '/api/export/matches?team=India',
+]
+
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'distinct', 'count'}
+
+# Command fields that describe the session or transport rather than the query
+_SESSION_FIELDS = {'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'readConcern', 'writeConcern'}
+
+
+def create_indexes(db, collection_names=None, target=None):
+    """Create the declared indexes; target overrides the collection written to (e.g. a staging copy)"""
+    created = {}
+    for name, models in INDEXES.items():
+        if collection_names is not None and name not in collection_names:
+            continue
+        collection = target if target is not None else db[name]
+        created[name] = collection.create_indexes(models)
+    return created
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Record the read commands sent to MongoDB, tagged with the current route"""
+
+    def __init__(self):
+        self.route = None
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            command = {key: value for key, value in event.command.items()
+                       if not key.startswith('$') and key not in _SESSION_FIELDS}
+            self.commands.append((self.route, event.database_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _has_filter(command):
+    """Whether the command restricts the documents it reads"""
+    if 'filter' in command:
+        return bool(command['filter'])
+    if 'query' in command:
+        return bool(command['query'])
+    for stage in command.get('pipeline', [])[:1]:
+        return bool(stage.get('$match'))
+    return False
+
+
+def _plan_stages(node):
+    """All stage names in a (possibly nested) explain document"""
+    if isinstance(node, dict):
+        if isinstance(node.get('stage'), str):
+            yield node['stage']
+        for value in node.values():
+            yield from _plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _plan_stages(item)
+
+
+def _winning_plans(node):
+    """Every winningPlan in an explain document, including those under aggregation stages"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'winningPlan':
+                yield value
+            else:
+                yield from _winning_plans(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _winning_plans(item)
+
+
+def review_plan(command, explain):
+    """Return (stages used, problems found) for one explained command"""
+    stages = []
+    for plan in _winning_plans(explain):
+        stages.extend(_plan_stages(plan))
+
+    problems = []
+    if 'COLLSCAN' in stages and _has_filter(command):
+        problems.append('COLLSCAN on a filtered query')
+    if 'SORT' in stages:
+        problems.append('in-memory SORT')
+    return stages, problems
+
+
+def audit(client, recorder, log=print):
+    """Explain every query the audited routes issue; returns the number of problems
+
+    recorder must have been registered with pymongo.monitoring before the
+    client was created.
+    """
+    from app import app, db
+
+    create_indexes(db)
+
+    test_client = app.test_client()
+    for url in AUDIT_URLS:
+        recorder.route = url
+        response = test_client.get(url)
+        if response.status_code >= 400:
+            log(f"!! {url} returned {response.status_code}")
+    recorder.route = None
+
+    problems_found = 0
+    seen = set()
+    for route, database_name, command in recorder.commands:
+        key = (database_name, repr(sorted(command.items(), key=lambda item: item[0])))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        command_name = next(iter(command))
+        explain = client[database_name].command({'explain': command, 'verbosity': 'queryPlanner'})
+        stages, problems = review_plan(command, explain)
+        problems_found += len(problems)
+
+        status = 'FAIL' if problems else 'ok  '
+        log(f"{status} {route}  {command_name} {command[command_name]}: {' > '.join(stages) or 'pipeline'}")
+        for problem in problems:
+            log(f"       {problem}: {command}")
+
+    log(f"{len(seen)} distinct queries explained, {problems_found} problem(s)")
+    return problems_found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage MongoDB indexes and audit query plans')
+    parser.add_argument('command', choices=['create', 'audit'])
+    args = parser.parse_args()
+
+    # Listeners only apply to clients created after registration
+    recorder = CommandRecorder()
+    monitoring.register(recorder)
+    import database
+    from app import client, db
+    if database.backend() != 'mongo':
+        parser.error('indexes are created in MongoDB; set MONGO_URI in the .env file or the environment')
+
+    if args.command == 'create':
+        for name, created in create_indexes(db).items():
+            print(f"{name}: {', '.join(created)}")
+        return 0
+
+    return 1 if audit(client, recorder) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
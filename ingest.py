@@ -0,0 +1,249 @@
+"""Load the bundled tournament CSVs into MongoDB
+
+Usage: python ingest.py [--batch-size N] [--only batting,bowling,...]
+
+Each CSV is typed and cleaned before it is written:
+- team names are trimmed and whitespace-collapsed, so Team1/Team2,
+  Team_Innings, Bowling_Team and team_name hold exact, indexable keys
+- bowling rows get Balls_Bowled, the overs converted to an integer ball count
+- World Cup players with a blank team take it from their batting/bowling rows
+- duplicate rows are rejected by the unique compound keys declared in
+  indexes.py, e.g. (Match_no, Batsman_Name, Team_Innings)
+
+Documents are loaded in batches into a staging collection that is renamed
+over the live one when complete, so the API never reads a half-loaded
+collection. The player profiles (see profiles.py) are then rebuilt from the
+loaded collections, and the data version of every reloaded collection is
+bumped so cached derived data is rebuilt.
+"""
+import argparse
+import csv
+import os
+
+from pymongo.errors import BulkWriteError
+
+from indexes import create_indexes
+from leaderboards import overs_to_balls
+from profiles import PROFILES_COLLECTION, build_profiles
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DUPLICATE_KEY_ERROR = 11000
+
+
+def canonical_team(name):
+    """Trim and collapse whitespace in a team name"""
+    return ' '.join((name or '').split())
+
+
+def to_int(value):
+    if value is None or str(value).strip() == '':
+        return None
+    return int(float(value))
+
+
+def to_float(value):
+    """Float value; blanks and placeholders such as '---' become None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_str(value):
+    return (value or '').strip()
+
+
+def fixture(value):
+    """Normalize 'England  vs New Zealand ' style fixtures"""
+    return ' vs '.join(canonical_team(team) for team in (value or '').split(' vs '))
+
+
+# dataset -> collection, CSV file and field converters
+DATASETS = {
+    'matches': {
+        'collection': 'matchScheduleResultsODIWC2023',
+        'csv': 'match_schedule_results.csv',
+        'fields': {
+            'Match_no': to_int,
+            'Date': to_str,
+            'Venue': to_str,
+            'Team1': canonical_team,
+            'Team2': canonical_team,
+            'Winner': canonical_team,
+            'Scorecard URL': to_str
+        }
+    },
+    'batting': {
+        'collection': 'battingODIWC2023',
+        'csv': 'batting_summary.csv',
+        'fields': {
+            'Match_no': to_int,
+            'Match_Between': fixture,
+            'Team_Innings': canonical_team,
+            'Batsman_Name': to_str,
+            'Batting_Position': to_int,
+            'Dismissal': to_str,
+            'Runs': to_int,
+            'Balls': to_int,
+            '4s': to_int,
+            '6s': to_int,
+            'Strike_Rate': to_float
+        }
+    },
+    'bowling': {
+        'collection': 'bowlingODIWC2023',
+        'csv': 'bowling_summary.csv',
+        'fields': {
+            'Match_no': to_int,
+            'Match_Between': fixture,
+            'Bowling_Team': canonical_team,
+            'Bowler_Name': to_str,
+            'Overs': to_float,
+            'Maidens': to_int,
+            'Runs': to_int,
+            'Wickets': to_int,
+            'Economy': to_float
+        }
+    },
+    'players': {
+        'collection': 'WCPlayersInfoODIWC2023',
+        'csv': 'world_cup_players_info.csv',
+        'fields': {
+            'player_name': to_str,
+            'team_name': canonical_team,
+            'image_of_player': to_str,
+            'battingStyle': to_str,
+            'bowlingStyle': to_str,
+            'playingRole': to_str,
+            'description': to_str
+        }
+    },
+    'players_info': {
+        'collection': 'ODIplayers_info',
+        'csv': 'players_info.csv',
+        'fields': {
+            'player_id': to_int,
+            'player_object_id': to_int,
+            'player_name': to_str,
+            'dob': to_str,
+            'dod': to_str,
+            'gender': to_str,
+            'batting_style': to_str,
+            'bowling_style': to_str,
+            'country_id': to_int,
+            'image_url': to_str,
+            'image_metadata': to_str
+        }
+    }
+}
+
+
+def read_dataset(name):
+    """Read and type the rows of one dataset"""
+    spec = DATASETS[name]
+    with open(os.path.join(DATA_DIR, spec['csv']), 'r', encoding='utf-8') as f:
+        rows = [
+            {field: convert(row.get(field)) for field, convert in spec['fields'].items()}
+            for row in csv.DictReader(f)
+        ]
+
+    if name == 'bowling':
+        for row in rows:
+            row['Balls_Bowled'] = overs_to_balls(row['Overs'] or 0)
+    return rows
+
+
+def fill_player_teams(players, batting, bowling):
+    """Give players with a blank team the team they batted or bowled for"""
+    teams = {}
+    for row in batting:
+        teams.setdefault(row['Batsman_Name'], row['Team_Innings'])
+    for row in bowling:
+        teams.setdefault(row['Bowler_Name'], row['Bowling_Team'])
+
+    filled = 0
+    for player in players:
+        if not player['team_name'] and teams.get(player['player_name']):
+            player['team_name'] = teams[player['player_name']]
+            filled += 1
+    return filled
+
+
+def load_collection(db, collection, rows, batch_size):
+    """Load rows into a staging collection and swap it in; returns (inserted, rejected)"""
+    staging = db[f"{collection}_staging"]
+    staging.drop()
+    create_indexes(db, [collection], target=staging)
+
+    inserted = 0
+    rejected = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            result = staging.insert_many(batch, ordered=False)
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            inserted += e.details.get('nInserted', 0)
+            rejected += len(errors)
+
+    staging.rename(collection, dropTarget=True)
+    return inserted, rejected
+
+
+def rebuild_profiles(db, batch_size=1000):
+    """Rebuild the player profiles from the loaded collections; returns how many were written"""
+    sources = [
+        list(db[DATASETS[name]['collection']].find({}, {'_id': 0}))
+        for name in ('players', 'players_info', 'matches', 'batting', 'bowling')
+    ]
+    inserted, _ = load_collection(db, PROFILES_COLLECTION, build_profiles(*sources), batch_size)
+    return inserted
+
+
+def ingest(db, names=None, batch_size=1000, log=print):
+    """Load the selected datasets (all by default), rebuild the profiles and bump their data versions"""
+    from app import bump_data_version
+
+    names = names or list(DATASETS)
+    data = {name: read_dataset(name) for name in set(names) | {'batting', 'bowling'}}
+
+    if 'players' in names:
+        filled = fill_player_teams(data['players'], data['batting'], data['bowling'])
+        log(f"players: filled {filled} blank team names from batting/bowling rows")
+
+    for name in names:
+        collection = DATASETS[name]['collection']
+        inserted, rejected = load_collection(db, collection, data[name], batch_size)
+        log(f"{name}: {inserted} inserted, {rejected} duplicates rejected -> {collection}")
+
+    profiles = rebuild_profiles(db, batch_size)
+    log(f"profiles: {profiles} rebuilt -> {PROFILES_COLLECTION}")
+
+    bump_data_version(*(db[DATASETS[name]['collection']] for name in names), db[PROFILES_COLLECTION])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load the bundled tournament CSVs into MongoDB')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--only', help=f"comma-separated subset of: {', '.join(DATASETS)}")
+    args = parser.parse_args()
+
+    names = None
+    if args.only:
+        names = [name.strip() for name in args.only.split(',') if name.strip()]
+        unknown = [name for name in names if name not in DATASETS]
+        if unknown:
+            parser.error(f"unknown dataset(s): {', '.join(unknown)}")
+
+    import database
+    from app import db
+    if database.backend() != 'mongo':
+        parser.error('ingest loads MongoDB; set MONGO_URI in the .env file or the environment')
+    ingest(db, names, batch_size=args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
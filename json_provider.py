@@ -0,0 +1,85 @@
+"""Fast JSON encoding for the API
+
+orjson is used when it is installed, with the standard library json as the
+fallback; both produce the same compact, key-sorted UTF-8 output. MongoDB
+and numpy values are converted on the way out: ObjectIds become their hex
+string, datetimes and dates ISO 8601 strings, Decimal128 and Decimal
+decimal strings, and numpy numbers and arrays plain numbers and lists.
+
+Routes serving derived data encode it once per data version with dumps()
+and return the stored bytes, so serialization only runs when the data
+changes.
+"""
+import datetime
+import decimal
+import json
+
+from bson import Decimal128, ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    # Optional: the standard library encoder is slower but equivalent
+    orjson = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def default(value):
+    """JSON-compatible form of the values neither encoder handles natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (decimal.Decimal, datetime.timedelta)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if numpy is not None:
+        if isinstance(value, numpy.generic):
+            return value.item()
+        if isinstance(value, numpy.ndarray):
+            return value.tolist()
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value, sort_keys=True):
+    """Encode a value as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        options = ORJSON_OPTIONS if sort_keys else ORJSON_OPTIONS & ~orjson.OPT_SORT_KEYS
+        return orjson.dumps(value, default=default, option=options)
+    return json.dumps(value, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by dumps(), used by jsonify() and request.get_json()"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for specific json.dumps options get exactly those
+            kwargs.setdefault('default', default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
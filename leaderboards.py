@@ -0,0 +1,231 @@
+"""Materialized batting and bowling leaderboards
+
+Player totals are computed once from the raw batting and bowling rows and
+kept in memory; each sort order is computed the first time it is asked for,
+so serving a page is a slice of an already sorted list. The most recently
+used orders are kept, up to ORDER_CACHE_SIZE per leaderboard.
+"""
+import threading
+from collections import OrderedDict
+
+ORDER_CACHE_SIZE = 32
+MAX_SORT_KEYS = 3
+
+# metric name -> (field or key function, best first when sorted descending)
+BATTING_METRICS = {
+    'runs': ('total_runs', True),
+    'balls': ('total_balls', True),
+    'fours': ('total_4s', True),
+    'sixes': ('total_6s', True),
+    'matches': ('matches', True),
+    'innings': ('innings', True),
+    'average': ('average', True),
+    'strike_rate': ('strike_rate', True),
+    'highest': ('highest_score', True),
+    'name': ('batsman', False),
+}
+
+BOWLING_METRICS = {
+    'wickets': ('total_wickets', True),
+    'runs': ('total_runs', False),
+    'balls': ('total_balls', True),
+    'overs': ('total_balls', True),
+    'maidens': ('total_maidens', True),
+    'matches': ('matches', True),
+    'economy': ('economy', False),
+    'average': ('average', False),
+    'strike_rate': ('strike_rate', False),
+    'best': (lambda entry: best_figures_key(entry['best_figures']), True),
+    'name': ('bowler', False),
+}
+
+
+def overs_to_balls(overs):
+    """Convert cricket overs (9.5 = 9 overs and 5 balls) to balls"""
+    overs_int = int(overs)
+    balls_remainder = int(round((overs - overs_int) * 10))
+    return (overs_int * 6) + balls_remainder
+
+
+def balls_to_overs(balls):
+    """Convert balls back to cricket overs notation"""
+    return float(f"{balls // 6}.{balls % 6}")
+
+
+def best_figures_key(figures):
+    """Sort key for bowling figures like '5/18': most wickets, then fewest runs"""
+    if not figures:
+        return None
+    wickets, runs = figures.split('/')
+    return (int(wickets), -int(runs))
+
+
+def _first_per_match(rows, player_field):
+    """Keep the first row per player, match number and fixture, dropping duplicate imports"""
+    seen = set()
+    for row in rows:
+        key = (row.get(player_field), row.get('Match_no'), row.get('Match_Between'))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield row
+
+
+def build_batting_entries(rows):
+    """Aggregate raw batting rows into one entry per batsman"""
+    totals = {}
+    for row in _first_per_match(rows, 'Batsman_Name'):
+        name = row.get('Batsman_Name')
+        entry = totals.get(name)
+        if entry is None:
+            entry = totals[name] = {
+                '_id': name,
+                'batsman': name,
+                'total_runs': 0,
+                'total_balls': 0,
+                'total_4s': 0,
+                'total_6s': 0,
+                'matches': 0,
+                'innings': 0,
+                'not_outs': 0,
+                'highest_score': 0
+            }
+        runs = row.get('Runs') or 0
+        entry['total_runs'] += runs
+        entry['total_balls'] += row.get('Balls') or 0
+        entry['total_4s'] += row.get('4s') or 0
+        entry['total_6s'] += row.get('6s') or 0
+        entry['matches'] += 1
+        entry['innings'] += 1
+        if 'not out' in str(row.get('Dismissal', '')).lower():
+            entry['not_outs'] += 1
+        entry['highest_score'] = max(entry['highest_score'], runs)
+
+    for entry in totals.values():
+        entry['strike_rate'] = (entry['total_runs'] / entry['total_balls']) * 100 if entry['total_balls'] else 0
+        dismissals = entry['innings'] - entry['not_outs']
+        entry['average'] = entry['total_runs'] / dismissals if dismissals else None
+    return list(totals.values())
+
+
+def build_bowling_entries(rows):
+    """Aggregate raw bowling rows into one entry per bowler"""
+    totals = {}
+    for row in _first_per_match(rows, 'Bowler_Name'):
+        name = row.get('Bowler_Name')
+        entry = totals.get(name)
+        if entry is None:
+            entry = totals[name] = {
+                'bowler': name,
+                'total_wickets': 0,
+                'total_runs': 0,
+                'total_balls': 0,
+                'total_maidens': 0,
+                'matches': 0,
+                'best_figures': None
+            }
+        wickets = row.get('Wickets') or 0
+        runs = row.get('Runs') or 0
+        entry['total_wickets'] += wickets
+        entry['total_runs'] += runs
+        # Ingested rows carry the ball count; older imports only have overs
+        balls = row.get('Balls_Bowled')
+        if balls is None:
+            balls = overs_to_balls(row.get('Overs') or 0)
+        entry['total_balls'] += balls
+        entry['total_maidens'] += row.get('Maidens') or 0
+        entry['matches'] += 1
+
+        figures = f"{wickets}/{runs}"
+        if entry['best_figures'] is None or best_figures_key(figures) > best_figures_key(entry['best_figures']):
+            entry['best_figures'] = figures
+
+    result = []
+    for entry in totals.values():
+        balls = entry['total_balls']
+        wickets = entry['total_wickets']
+        entry['total_overs'] = balls_to_overs(balls)
+        entry['economy'] = (entry['total_runs'] / balls * 6) if balls > 0 else 0
+        entry['average'] = entry['total_runs'] / wickets if wickets else None
+        entry['strike_rate'] = balls / wickets if wickets else None
+        result.append(entry)
+    return result
+
+
+class Leaderboard:
+    """Player entries with lazily computed, memoized sort orders"""
+
+    def __init__(self, entries, metrics, name_field):
+        self.entries = entries
+        self.metrics = metrics
+        self.name_field = name_field
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse_sort(self, sort):
+        """Parse 'wickets,-economy' into ((metric, descending), ...)
+
+        Every metric sorts best first; a leading '-' reverses it. A metric
+        named again is ignored, since its first key already decides every tie
+        it could break.
+        """
+        spec = []
+        seen = set()
+        for part in sort.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            reverse = part.startswith('-')
+            metric = part.lstrip('-')
+            if metric not in self.metrics:
+                raise ValueError(f"Unknown sort metric '{metric}'. Use one of: {', '.join(sorted(self.metrics))}")
+            if metric in seen:
+                continue
+            seen.add(metric)
+            descending = self.metrics[metric][1]
+            spec.append((metric, descending != reverse))
+        if not spec:
+            raise ValueError('sort must name at least one metric')
+        if len(spec) > MAX_SORT_KEYS:
+            raise ValueError(f'sort can name at most {MAX_SORT_KEYS} metrics')
+        return tuple(spec)
+
+    def _key(self, metric):
+        field = self.metrics[metric][0]
+        if callable(field):
+            return field
+        return lambda entry: entry[field]
+
+    def _sorted(self, spec):
+        with self._lock:
+            order = self._orders.get(spec)
+            if order is not None:
+                self._orders.move_to_end(spec)
+                return order
+
+        # Stable sorts from the last key to the first; missing values
+        # (e.g. no dismissals yet) always go last, names break ties
+        order = sorted(self.entries, key=lambda entry: entry[self.name_field])
+        for metric, descending in reversed(spec):
+            key = self._key(metric)
+            present = [entry for entry in order if key(entry) is not None]
+            missing = [entry for entry in order if key(entry) is None]
+            present.sort(key=key, reverse=descending)
+            order = present + missing
+
+        with self._lock:
+            self._orders[spec] = order
+            self._orders.move_to_end(spec)
+            while len(self._orders) > ORDER_CACHE_SIZE:
+                self._orders.popitem(last=False)
+        return order
+
+    def page(self, sort, offset=0, limit=10, minimums=None):
+        """Return (total qualifying entries, entries for the requested page)"""
+        order = self._sorted(self.parse_sort(sort))
+        if minimums:
+            order = [
+                entry for entry in order
+                if all((entry[field] or 0) >= minimum for field, minimum in minimums.items())
+            ]
+        return len(order), order[offset:offset + limit]
@@ -0,0 +1,260 @@
+"""Live feed of batting and bowling writes, served as Server-Sent Events
+
+One watcher per process follows the batting and bowling collections
+through a MongoDB change stream, so live updates need a replica set: on a
+standalone mongod or the memory backend the feed only sends keepalives.
+Bulk reloads by ingest.py swap whole collections and are not streamed as
+rows either; clients refetch when the data version changes. Each written row
+becomes an 'innings' event carrying the new or updated scorecard line. When
+the write moves the top of a leaderboard, a 'leaderboard' event carries only
+the changed positions. The leaderboards are kept up to date by rebuilding
+the entry of the player who changed rather than re-reading the collection.
+
+Events are encoded once and appended to a short shared history. Subscribers
+only remember the id of the last event they sent and wait on one condition,
+so thousands of idle connections cost no per-subscriber queue. A subscriber
+that falls further behind than the history gets a 'reset' event telling it
+to refetch. Holding that many open connections needs an async worker class
+(e.g. gunicorn -k gevent); serverless functions end streams at their time
+limit and clients reconnect with Last-Event-ID.
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+import json_provider
+from leaderboards import (
+    BATTING_METRICS, BOWLING_METRICS, Leaderboard, build_batting_entries, build_bowling_entries
+)
+
+HISTORY_SIZE = 1000
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 3000
+LEADERBOARD_SIZE = 10
+
+# Change streams are unavailable on a standalone server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+log = logging.getLogger('odiwc2023.live')
+
+# kind -> how its rows are keyed and aggregated
+BOARDS = {
+    'batting': {
+        'player_field': 'Batsman_Name',
+        'team_field': 'Team_Innings',
+        'build': build_batting_entries,
+        'metrics': BATTING_METRICS,
+        'name_field': 'batsman',
+        'sort': 'runs'
+    },
+    'bowling': {
+        'player_field': 'Bowler_Name',
+        'team_field': 'Bowling_Team',
+        'build': build_bowling_entries,
+        'metrics': BOWLING_METRICS,
+        'name_field': 'bowler',
+        'sort': 'wickets'
+    }
+}
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def format_event(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json_provider.dumps(data, sort_keys=False).decode('utf-8')}\n\n"
+
+
+class Broadcaster:
+    """Shared, numbered history of encoded events that any number of subscribers wait on"""
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self._events = deque(maxlen=history_size)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, event_type, data, match_no=None):
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, match_no, format_event(self._last_id, event_type, data)))
+            self._condition.notify_all()
+
+    def wait(self, last_id, timeout):
+        """Events after last_id, waiting up to timeout for one: (events, new last id)
+
+        events is None when some were already dropped from the history.
+        """
+        with self._condition:
+            if self._last_id <= last_id:
+                self._condition.wait(timeout)
+            if self._last_id <= last_id:
+                return [], last_id
+            oldest = self._events[0][0]
+            if last_id + 1 < oldest:
+                return None, self._last_id
+            return list(itertools.islice(self._events, last_id + 1 - oldest, None)), self._last_id
+
+
+class _Board:
+    def __init__(self, spec, rows):
+        self.spec = spec
+        self.rows = {}
+        for row in rows:
+            self.rows.setdefault(row.get(spec['player_field']), {})[self._key(row)] = row
+        self.entries = {}
+        for name, player_rows in self.rows.items():
+            self.entries[name] = self._entry(player_rows)
+        self.top = self._top()
+
+    def _key(self, row):
+        return (row.get('Match_no'), row.get(self.spec['player_field']), row.get(self.spec['team_field']))
+
+    def _entry(self, player_rows):
+        entry = dict(self.spec['build'](player_rows.values())[0])
+        entry.pop('_id', None)
+        return entry
+
+    def _top(self):
+        leaderboard = Leaderboard(list(self.entries.values()), self.spec['metrics'], self.spec['name_field'])
+        return leaderboard.page(self.spec['sort'], limit=LEADERBOARD_SIZE)[1]
+
+    def apply(self, row):
+        """Store a written row: ('new' or 'updated', leaderboard changes), or None if nothing changed"""
+        name = row.get(self.spec['player_field'])
+        player_rows = self.rows.setdefault(name, {})
+        key = self._key(row)
+        if player_rows.get(key) == row:
+            return None
+        change = 'updated' if key in player_rows else 'new'
+        player_rows[key] = row
+        self.entries[name] = self._entry(player_rows)
+
+        name_field = self.spec['name_field']
+        previous = {entry[name_field]: (position, entry) for position, entry in enumerate(self.top, 1)}
+        self.top = self._top()
+        changes = []
+        for position, entry in enumerate(self.top, 1):
+            before = previous.pop(entry[name_field], None)
+            if before is None or before != (position, entry):
+                changes.append({
+                    'position': position,
+                    'previous_position': before[0] if before else None,
+                    'entry': entry
+                })
+        for dropped, (position, _) in previous.items():
+            changes.append({'position': None, 'previous_position': position, 'entry': {name_field: dropped}})
+        return change, changes
+
+
+class LiveFeed:
+    """Current batting and bowling state plus the broadcaster its changes go to"""
+
+    def __init__(self, collections):
+        # kind -> collection
+        self.collections = collections
+        self.broadcaster = Broadcaster()
+        self._boards = {
+            kind: _Board(BOARDS[kind], collection.find({}, {'_id': 0}))
+            for kind, collection in collections.items()
+        }
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def publish_write(self, kind, row):
+        """Publish a batting or bowling row that was inserted or updated"""
+        row = {field: value for field, value in row.items() if field != '_id'}
+        with self._lock:
+            result = self._boards[kind].apply(row)
+            if result is None:
+                return
+            change, leaderboard_changes = result
+            self.broadcaster.publish('innings', {'kind': kind, 'change': change, 'line': row},
+                                     match_no=row.get('Match_no'))
+            if leaderboard_changes:
+                self.broadcaster.publish('leaderboard', {
+                    'board': kind,
+                    'sort': BOARDS[kind]['sort'],
+                    'changes': leaderboard_changes
+                })
+
+    def watch(self):
+        """Follow the collections through a change stream on a background thread"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='live-change-stream', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        kinds = {collection.name: kind for kind, collection in self.collections.items()}
+        database = next(iter(self.collections.values())).database
+        pipeline = [{'$match': {
+            'ns.coll': {'$in': list(kinds)},
+            'operationType': {'$in': ['insert', 'update', 'replace']}
+        }}]
+        resume_token = None
+        delay = 1
+        while True:
+            try:
+                with database.watch(pipeline, full_document='updateLookup', resume_after=resume_token) as stream:
+                    delay = 1
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        if change.get('fullDocument'):
+                            self.publish_write(kinds[change['ns']['coll']], change['fullDocument'])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    log.warning('Change streams need a replica set; the live feed will not publish writes')
+                    return
+                log.warning('Change stream failed, retrying in %ds: %s', delay, e)
+            except PyMongoError as e:
+                log.warning('Change stream failed, retrying in %ds: %s', delay, e)
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def stream(self, last_id=None, match_no=None):
+        """Generate the SSE body for one subscriber, optionally only one match's innings events"""
+        if last_id is None or last_id > self.broadcaster.last_id:
+            last_id = self.broadcaster.last_id
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            events, last_id = self.broadcaster.wait(last_id, HEARTBEAT_SECONDS)
+            if events is None:
+                yield format_event(last_id, 'reset', {})
+            elif not events:
+                # Keeps proxies from closing the connection and detects disconnects
+                yield ': keepalive\n\n'
+            else:
+                chunk = ''.join(
+                    payload for _, event_match, payload in events
+                    if match_no is None or event_match is None or event_match == match_no
+                )
+                if chunk:
+                    yield chunk
+
+
+def get_feed(collections, watch=False):
+    """Return the process-wide live feed, loading it (and starting the watcher) on first use"""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                feed = LiveFeed(collections)
+                if watch:
+                    feed.watch()
+                _feed = feed
+    return _feed
+
+
+def reset_after_fork():
+    """Drop a feed inherited from the parent process; its watcher thread did not survive the fork"""
+    global _feed, _feed_lock
+    _feed = None
+    _feed_lock = threading.Lock()
+
@@ -0,0 +1,421 @@
+"""In-process storage backend serving the bundled CSVs without MongoDB
+
+The CSVs are read once, typed and cleaned exactly as ingest.py loads them
+into MongoDB (including the duplicate rows rejected by the unique keys in
+indexes.py), and kept as in-memory tables. MemoryClient answers the subset
+of the pymongo API the app uses, so every route runs unchanged and returns
+the same JSON as against an ingested database.
+
+Supported: find / find_one with filters, projections, sort and limit,
+count_documents, distinct, aggregate with $match, $group ($sum), $addFields
+($add, $subtract, $multiply, $divide), $project, $sort and $limit, and
+update_one with $inc for the data version counters. Filters may use
+equality, $in, $nin, $gt, $gte, $lt, $lte, $ne, $regex, $or and $and.
+Equality and $in filters on a field are answered from a hash index built
+the first time the field is queried.
+"""
+import re
+import threading
+
+from ingest import DATASETS, fill_player_teams, read_dataset
+from indexes import INDEXES
+from profiles import PROFILES_COLLECTION, build_profiles
+
+_NUMBER_TYPES = (int, float)
+
+
+def _type_rank(value):
+    """BSON comparison order: null, numbers, strings, everything else"""
+    if value is None:
+        return 0
+    if isinstance(value, _NUMBER_TYPES) and not isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return 2
+    return 3
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    return (rank, value if rank in (1, 2) else 0)
+
+
+def _comparable(a, b):
+    # Comparisons never match across types, as in MongoDB
+    return a is not None and b is not None and _type_rank(a) == _type_rank(b) and _type_rank(a) in (1, 2)
+
+
+def _match_condition(value, condition):
+    """Whether a document value satisfies one field condition"""
+    if not isinstance(condition, dict) or not any(key.startswith('$') for key in condition):
+        return value == condition
+
+    for operator, operand in condition.items():
+        if operator == '$in':
+            if value not in operand:
+                return False
+        elif operator == '$nin':
+            if value in operand:
+                return False
+        elif operator == '$ne':
+            if value == operand:
+                return False
+        elif operator == '$gt':
+            if not (_comparable(value, operand) and value > operand):
+                return False
+        elif operator == '$gte':
+            if not (_comparable(value, operand) and value >= operand):
+                return False
+        elif operator == '$lt':
+            if not (_comparable(value, operand) and value < operand):
+                return False
+        elif operator == '$lte':
+            if not (_comparable(value, operand) and value <= operand):
+                return False
+        elif operator == '$regex':
+            flags = re.IGNORECASE if 'i' in condition.get('$options', '') else 0
+            if not isinstance(value, str) or not re.search(operand, value, flags):
+                return False
+        elif operator == '$options':
+            continue
+        else:
+            raise NotImplementedError(f"memstore does not support the {operator} query operator")
+    return True
+
+
+def matches_filter(document, query):
+    """Whether a document matches a MongoDB-style filter"""
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(matches_filter(document, clause) for clause in condition):
+                return False
+        elif field == '$and':
+            if not all(matches_filter(document, clause) for clause in condition):
+                return False
+        elif field.startswith('$'):
+            raise NotImplementedError(f"memstore does not support the {field} query operator")
+        elif not _match_condition(document.get(field), condition):
+            return False
+    return True
+
+
+def project(document, projection):
+    """Apply an inclusion or exclusion projection, returning a new document"""
+    if not projection:
+        return dict(document)
+    include_id = projection.get('_id', 1)
+    included = [field for field, flag in projection.items() if flag and field != '_id']
+    if included:
+        result = {}
+        if include_id and '_id' in document:
+            result['_id'] = document['_id']
+        for field in included:
+            if field in document:
+                result[field] = document[field]
+        return result
+
+    excluded = {field for field, flag in projection.items() if not flag}
+    return {field: value for field, value in document.items() if field not in excluded}
+
+
+def _normalize_sort(key_or_list, direction=None):
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def sort_documents(documents, spec):
+    """Sort documents by [(field, direction), ...]; ties keep their stored order"""
+    documents = list(documents)
+    for field, direction in reversed(spec):
+        documents.sort(key=lambda document: _sort_key(document.get(field)), reverse=direction < 0)
+    return documents
+
+
+class MemoryCursor:
+    """Lazily evaluated result of find(), supporting sort, limit and batch_size"""
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size):
+        # Results are already in memory
+        return self
+
+    def __iter__(self):
+        documents = self._collection._matching(self._query)
+        if self._sort:
+            documents = sort_documents(documents, self._sort)
+        if self._limit:
+            documents = documents[:self._limit]
+        return (project(document, self._projection) for document in documents)
+
+
+class MemoryCollection:
+    """An in-memory table with lazily built hash indexes"""
+
+    def __init__(self, name, documents=()):
+        self.name = name
+        self._documents = list(documents)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def _index(self, field):
+        index = self._indexes.get(field)
+        if index is None:
+            index = {}
+            for position, document in enumerate(self._documents):
+                value = document.get(field)
+                try:
+                    index.setdefault(value, []).append(position)
+                except TypeError:
+                    # Unhashable values cannot be indexed; fall back to a scan
+                    return None
+            self._indexes[field] = index
+        return index
+
+    def _candidates(self, query):
+        """Positions that can match, from the first indexable equality or $in condition"""
+        for field, condition in query.items():
+            if field.startswith('$'):
+                continue
+            if isinstance(condition, dict) and any(key.startswith('$') for key in condition):
+                if set(condition) != {'$in'}:
+                    continue
+                values = condition['$in']
+            else:
+                values = [condition]
+            index = self._index(field)
+            if index is None:
+                continue
+            positions = set()
+            for value in values:
+                try:
+                    positions.update(index.get(value, ()))
+                except TypeError:
+                    return None
+            return sorted(positions)
+        return None
+
+    def _matching(self, query):
+        positions = self._candidates(query) if query else None
+        documents = self._documents if positions is None else [self._documents[i] for i in positions]
+        if not query:
+            return list(documents)
+        return [document for document in documents if matches_filter(document, query)]
+
+    def find(self, query=None, projection=None):
+        return MemoryCursor(self, query, projection)
+
+    def find_one(self, query=None, projection=None):
+        for document in self.find(query, projection).limit(1):
+            return document
+        return None
+
+    def count_documents(self, query):
+        return len(self._matching(query))
+
+    def distinct(self, field, query=None):
+        """Distinct values in BSON order, as MongoDB returns them"""
+        values = {}
+        for document in self._matching(query or {}):
+            if field in document:
+                values.setdefault(document[field], document[field])
+        return sorted(values.values(), key=_sort_key)
+
+    def aggregate(self, pipeline):
+        documents = self._documents
+        for stage in pipeline:
+            (operator, spec), = stage.items()
+            if operator == '$match':
+                if documents is self._documents:
+                    documents = self._matching(spec)
+                else:
+                    documents = [document for document in documents if matches_filter(document, spec)]
+            elif operator == '$group':
+                documents = _group(documents, spec)
+            elif operator == '$addFields':
+                documents = [dict(document, **{field: _evaluate(document, expression)
+                                               for field, expression in spec.items()})
+                             for document in documents]
+            elif operator == '$project':
+                documents = [project(document, spec) for document in documents]
+            elif operator == '$sort':
+                documents = sort_documents(documents, list(spec.items()))
+            elif operator == '$limit':
+                documents = documents[:spec]
+            else:
+                raise NotImplementedError(f"memstore does not support the {operator} aggregation stage")
+        return iter([dict(document) for document in documents])
+
+    def update_one(self, query, update, upsert=False):
+        """Apply $inc to the first matching document, inserting it on upsert"""
+        if set(update) != {'$inc'}:
+            raise NotImplementedError('memstore only supports $inc updates')
+        with self._lock:
+            matched = self._matching(query)
+            if matched:
+                document = matched[0]
+            elif upsert:
+                document = {field: value for field, value in query.items() if not field.startswith('$')}
+                self._documents.append(document)
+            else:
+                return
+            for field, amount in update['$inc'].items():
+                document[field] = document.get(field, 0) + amount
+            # Updated values may be indexed
+            self._indexes = {}
+
+
+def _field_value(document, expression):
+    if isinstance(expression, str) and expression.startswith('$'):
+        return document.get(expression[1:])
+    return expression
+
+
+_ARITHMETIC = {
+    '$add': lambda a, b: a + b,
+    '$subtract': lambda a, b: a - b,
+    '$multiply': lambda a, b: a * b,
+    '$divide': lambda a, b: a / b,
+}
+
+
+def _evaluate(document, expression):
+    """Value of a field path, constant or arithmetic expression; None if an operand is missing"""
+    if isinstance(expression, dict):
+        (operator, operands), = expression.items()
+        if operator not in _ARITHMETIC:
+            raise NotImplementedError(f"memstore does not support the {operator} expression")
+        values = [_evaluate(document, operand) for operand in operands]
+        if any(value is None for value in values):
+            return None
+        result = values[0]
+        for value in values[1:]:
+            result = _ARITHMETIC[operator](result, value)
+        return result
+    return _field_value(document, expression)
+
+
+def _group(documents, spec):
+    """$group supporting a field or constant _id and $sum accumulators"""
+    groups = {}
+    for document in documents:
+        key = _field_value(document, spec['_id'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'_id': key}
+            for field in spec:
+                if field != '_id':
+                    group[field] = 0
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (operator, expression), = accumulator.items()
+            if operator != '$sum':
+                raise NotImplementedError(f"memstore does not support the {operator} accumulator")
+            value = _field_value(document, expression)
+            if isinstance(value, _NUMBER_TYPES) and not isinstance(value, bool):
+                group[field] += value
+    return list(groups.values())
+
+
+def load_tables():
+    """Read every dataset and build the profiles as ingest.py would: collection name -> documents"""
+    data = {name: read_dataset(name) for name in DATASETS}
+    fill_player_teams(data['players'], data['batting'], data['bowling'])
+
+    tables = {}
+    for name, spec in DATASETS.items():
+        collection = spec['collection']
+        unique_fields = [
+            list(model.document['key'])
+            for model in INDEXES.get(collection, [])
+            if model.document.get('unique')
+        ]
+        seen = [set() for _ in unique_fields]
+        documents = []
+        for row in data[name]:
+            keys = [tuple(row.get(field) for field in fields) for fields in unique_fields]
+            # Rows the unique indexes would reject
+            if any(key in seen_keys for key, seen_keys in zip(keys, seen)):
+                continue
+            for key, seen_keys in zip(keys, seen):
+                seen_keys.add(key)
+            row['_id'] = len(documents)
+            documents.append(row)
+        tables[collection] = documents
+
+    profiles = build_profiles(*(
+        tables[DATASETS[name]['collection']]
+        for name in ('players', 'players_info', 'matches', 'batting', 'bowling')
+    ))
+    for position, profile in enumerate(profiles):
+        profile['_id'] = position
+    tables[PROFILES_COLLECTION] = profiles
+    return tables
+
+
+class MemoryDatabase:
+    def __init__(self, name, tables):
+        self.name = name
+        self._collections = {
+            collection: MemoryCollection(collection, documents)
+            for collection, documents in tables.items()
+        }
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.setdefault(name, MemoryCollection(name))
+        return collection
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == 'ping':
+            return {'ok': 1.0}
+        raise NotImplementedError(f"memstore does not support the {name} command")
+
+
+class MemoryClient:
+    """Stands in for MongoClient with every database served from the bundled CSVs"""
+
+    def __init__(self, tables=None):
+        self._tables = load_tables() if tables is None else tables
+        self._databases = {}
+        self._lock = threading.Lock()
+        self.admin = MemoryDatabase('admin', {})
+
+    def __getitem__(self, name):
+        database = self._databases.get(name)
+        if database is None:
+            with self._lock:
+                database = self._databases.get(name)
+                if database is None:
+                    database = self._databases[name] = MemoryDatabase(name, self._tables)
+        return database
+
+    def server_info(self):
+        return {'version': 'memstore'}
+
+    def list_database_names(self):
+        return list(self._databases)
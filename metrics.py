@@ -0,0 +1,243 @@
+"""Request and MongoDB command metrics in the Prometheus text format
+
+Every request is timed and counted by route, method and status, and its
+response size recorded. A pymongo CommandListener times every command and
+attributes it to the route that issued it, including commands run on the
+query pool (database.run_concurrently copies the request context), and the
+number of commands per request shows which routes issue N+1 queries.
+Commands slower than SLOW_QUERY_MS are logged.
+
+The registry is process-wide; each worker or serverless instance reports
+its own counters.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from pymongo import monitoring
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+slow_query_log = logging.getLogger('odiwc2023.slow_queries')
+
+_registry = []
+_current_request = contextvars.ContextVar('current_request', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label set"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def total(self, *labels):
+        """(sum, count) of the observations for one label set"""
+        with self._lock:
+            entry = self._values.get(labels)
+            return (entry[1], entry[2]) if entry else (0.0, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((labels, ([*counts], total, count)) for labels, (counts, total, count) in self._values.items())
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labelnames, labels, [('le', _format_number(bound))])
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_number(total)}')
+            lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'odiwc_http_request_duration_seconds', 'Time from the start of a request to its response.',
+    ('route', 'method'))
+REQUESTS = Counter(
+    'odiwc_http_requests_total', 'Responses by route, method and status.',
+    ('route', 'method', 'status'))
+RESPONSE_SIZE = Histogram(
+    'odiwc_http_response_size_bytes', 'Response body size as sent, after compression.',
+    ('route',), SIZE_BUCKETS)
+COMMAND_DURATION = Histogram(
+    'odiwc_mongo_command_duration_seconds', 'MongoDB command round trips by issuing route.',
+    ('route', 'command', 'collection'))
+COMMAND_FAILURES = Counter(
+    'odiwc_mongo_command_failures_total', 'MongoDB commands that failed.',
+    ('route', 'command', 'collection'))
+COMMANDS_PER_REQUEST = Histogram(
+    'odiwc_mongo_commands_per_request', 'MongoDB commands issued while serving one request.',
+    ('route',), COMMAND_COUNT_BUCKETS)
+RESPONSE_CACHE = Counter(
+    'odiwc_response_cache_requests_total', 'Response cache lookups: hit, coalesced, lead (a miss) or bypass.',
+    ('route', 'result'))
+SLOW_COMMANDS = Counter(
+    'odiwc_mongo_slow_commands_total', 'MongoDB commands slower than SLOW_QUERY_MS.',
+    ('route', 'command', 'collection'))
+
+
+class RequestStats:
+    """The route being served and the MongoDB commands it has issued so far"""
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        # Appended to from the query pool threads too
+        self.commands = []
+
+
+def start_request(route, method):
+    _current_request.set(RequestStats(route, method))
+
+
+def finish_request(status, size):
+    """Record the finished request; size is None when the body is streamed"""
+    stats = _current_request.get()
+    if stats is None:
+        return
+    REQUEST_DURATION.observe(time.perf_counter() - stats.started, stats.route, stats.method)
+    REQUESTS.inc(stats.route, stats.method, str(status))
+    if size is not None:
+        RESPONSE_SIZE.observe(size, stats.route)
+    COMMANDS_PER_REQUEST.observe(len(stats.commands), stats.route)
+
+
+def _collection(event):
+    target = event.command.get(event.command_name)
+    if event.command_name == 'getMore':
+        target = event.command.get('collection')
+    return target if isinstance(target, str) else ''
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Time every MongoDB command and attribute it to the current request's route"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        self._pending[event.request_id] = (_current_request.get(), _collection(event), event.command)
+
+    def _finish(self, event):
+        stats, collection, command = self._pending.pop(event.request_id, (None, '', None))
+        route = stats.route if stats is not None else ''
+        if stats is not None:
+            stats.commands.append(event.command_name)
+        return route, collection, command
+
+    def succeeded(self, event):
+        route, collection, command = self._finish(event)
+        duration_ms = event.duration_micros / 1000
+        COMMAND_DURATION.observe(duration_ms / 1000, route, event.command_name, collection)
+        if duration_ms >= SLOW_QUERY_MS:
+            SLOW_COMMANDS.inc(route, event.command_name, collection)
+            details = {key: value for key, value in (command or {}).items()
+                       if key in ('filter', 'pipeline', 'query', 'sort', 'projection', 'key')}
+            slow_query_log.warning('Slow %s on %s: %.1f ms for %s %s', event.command_name, collection,
+                                   duration_ms, route or '(no request)', details)
+
+    def failed(self, event):
+        route, collection, _ = self._finish(event)
+        COMMAND_FAILURES.inc(route, event.command_name, collection)
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def register_command_listener():
+    """Listen to every MongoDB client created from now on; safe to call more than once"""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = CommandMetrics()
+            monitoring.register(_listener)
+
+
+def reset_after_fork():
+    """Zero every metric in a forked worker, so commands run by the parent are not reported by each worker"""
+    global _listener_lock
+    for metric in _registry:
+        metric._values = {}
+        metric._lock = threading.Lock()
+    if _listener is not None:
+        _listener._pending = {}
+    _listener_lock = threading.Lock()
+
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
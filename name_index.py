@@ -0,0 +1,325 @@
+"""Fuzzy name matching over player and team names
+
+NameIndex is built once per list of names and answers the same ranked
+queries as the brute-force fuzzy_match below, using a trigram index to pick
+candidates and a threshold-bounded edit distance to verify them.
+"""
+from bisect import bisect_right
+
+GRAM_SIZE = 3
+PAD = '\x00' * (GRAM_SIZE - 1)
+
+
+def levenshtein_distance(s1, s2):
+    """Calculate the Levenshtein distance between two strings"""
+    s1, s2 = s1.lower(), s2.lower()
+    if len(s1) < len(s2):
+        return levenshtein_distance(s2, s1)
+
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def bounded_levenshtein(s1, s2, max_distance):
+    """Levenshtein distance if it is at most max_distance, otherwise None
+
+    Only the diagonal band of width max_distance is computed and the
+    comparison stops as soon as a whole row exceeds the bound.
+    """
+    if abs(len(s1) - len(s2)) > max_distance:
+        return None
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    n = len(s2)
+    if n == 0:
+        return len(s1)
+
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(n + 1)]
+    for i in range(1, len(s1) + 1):
+        c1 = s1[i - 1]
+        current = [over] * (n + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(n, i + max_distance) + 1):
+            cost = previous[j - 1] + (c1 != s2[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            if cost > over:
+                cost = over
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    return previous[n] if previous[n] <= max_distance else None
+
+
+def fuzzy_match(query, candidates, threshold=2):
+    """Find candidates that match the query within a certain edit distance threshold
+
+    Brute-force reference implementation; NameIndex.search returns the same
+    results without scanning every candidate.
+    """
+    matches = []
+    query_lower = query.lower()
+
+    for candidate in candidates:
+        candidate_lower = candidate.lower()
+
+        # Exact match gets highest priority
+        if query_lower in candidate_lower:
+            matches.append((candidate, 0))
+        else:
+            # Check if query matches any word in the candidate
+            words = candidate_lower.split()
+            min_distance = float('inf')
+
+            for word in words:
+                distance = levenshtein_distance(query_lower, word)
+                min_distance = min(min_distance, distance)
+
+            # Also check full name distance for short queries
+            if len(query_lower) >= 3:
+                full_distance = levenshtein_distance(query_lower, candidate_lower)
+                min_distance = min(min_distance, full_distance)
+
+            if min_distance <= threshold:
+                matches.append((candidate, min_distance))
+
+    # Sort by distance (closer matches first)
+    matches.sort(key=lambda x: x[1])
+    return [match[0] for match in matches]
+
+
+def _grams(term):
+    """Padded trigrams of a term, numbered by occurrence so repeats stay distinct"""
+    padded = PAD + term + PAD
+    seen = {}
+    grams = []
+    for i in range(len(padded) - GRAM_SIZE + 1):
+        gram = padded[i:i + GRAM_SIZE]
+        occurrence = seen.get(gram, 0)
+        seen[gram] = occurrence + 1
+        grams.append((gram, occurrence))
+    return grams
+
+
+class NameIndex:
+    """Trigram index over the words and full names of a list of candidates"""
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+        lowered = [candidate.lower() for candidate in self.candidates]
+
+        # Substring matches are found by scanning one joined string
+        self._haystack = '\n'.join(lowered)
+        self._starts = []
+        offset = 0
+        for name in lowered:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+        # Distinct terms (single words and full names) and where they occur
+        self._terms = []
+        self._word_owners = []
+        self._full_owners = []
+        term_ids = {}
+        for position, name in enumerate(lowered):
+            for term, owners in [(word, '_word_owners') for word in name.split()] + [(name, '_full_owners')]:
+                term_id = term_ids.get(term)
+                if term_id is None:
+                    term_id = term_ids[term] = len(self._terms)
+                    self._terms.append(term)
+                    self._word_owners.append([])
+                    self._full_owners.append([])
+                getattr(self, owners)[term_id].append(position)
+
+        self._postings = {}
+        self._by_length = {}
+        for term_id, term in enumerate(self._terms):
+            for gram in _grams(term):
+                self._postings.setdefault(gram, []).append(term_id)
+            self._by_length.setdefault(len(term), []).append(term_id)
+
+    def _substring_hits(self, query):
+        """Positions of candidates that contain the query"""
+        if '\n' in query:
+            return {i for i, start in enumerate(self._starts)
+                    if query in self._haystack[start:start + len(self.candidates[i])]}
+
+        hits = set()
+        position = self._haystack.find(query)
+        while position != -1:
+            index = bisect_right(self._starts, position) - 1
+            hits.add(index)
+            if index + 1 >= len(self._starts):
+                break
+            position = self._haystack.find(query, self._starts[index + 1])
+        return hits
+
+    def _terms_within(self, query, threshold):
+        """Yield (term_id, distance) for every term within threshold edits of the query"""
+        query_grams = _grams(query)
+        shared = {}
+        for gram in query_grams:
+            for term_id in self._postings.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        # A term within k edits shares at least max(|grams|) - 3k grams with
+        # the query; terms so short that the bound is not positive are scanned
+        # by length instead
+        candidates = set()
+        for term_id, count in shared.items():
+            term_grams = len(self._terms[term_id]) + GRAM_SIZE - 1
+            if count >= max(term_grams, len(query_grams)) - GRAM_SIZE * threshold:
+                candidates.add(term_id)
+        for length in range(max(0, len(query) - threshold), len(query) + threshold + 1):
+            if max(length + GRAM_SIZE - 1, len(query_grams)) - GRAM_SIZE * threshold <= 0:
+                candidates.update(self._by_length.get(length, ()))
+
+        for term_id in candidates:
+            distance = bounded_levenshtein(query, self._terms[term_id], threshold)
+            if distance is not None:
+                yield term_id, distance
+
+    def search(self, query, threshold=2):
+        """Candidates within the threshold, closest first, ties in original order"""
+        query_lower = query.lower()
+        if not query_lower:
+            return list(self.candidates)
+
+        best = {}
+        for term_id, distance in self._terms_within(query_lower, threshold):
+            owners = self._word_owners[term_id]
+            if len(query_lower) >= 3:
+                owners = owners + self._full_owners[term_id]
+            for position in owners:
+                if distance < best.get(position, threshold + 1):
+                    best[position] = distance
+
+        for position in self._substring_hits(query_lower):
+            best[position] = 0
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], item[0]))
+        return [self.candidates[position] for position, _ in ranked]
+
+
+class PrefixTrie:
+    """Prefix trie over typed names for typeahead suggestions
+
+    Every name is reachable from its start and from the start of each later
+    word, so "kohli" finds "Virat Kohli". Each node keeps its best entries
+    pre-sorted, so an exact prefix lookup is a walk down the trie.
+    """
+
+    def __init__(self, entries, type_order=(), max_results=20):
+        # entries: dicts with at least 'type' and 'name'; ranking between
+        # equally good matches follows type_order, then the name
+        type_rank = {entry_type: rank for rank, entry_type in enumerate(type_order)}
+        self.entries = sorted(
+            entries,
+            key=lambda entry: (type_rank.get(entry['type'], len(type_rank)), entry['name'].lower())
+        )
+        self.max_results = max_results
+        self._root = {}
+
+        # node -> {entry_id: kind}, kind 0 when the name starts with the
+        # prefix and 1 when a later word does
+        collected = {}
+        for entry_id, entry in enumerate(self.entries):
+            words = _normalize(entry['name']).split(' ')
+            for start in range(len(words)):
+                term = ' '.join(words[start:])
+                kind = 0 if start == 0 else 1
+                node = self._root
+                for char in term:
+                    node = node.setdefault(char, {})
+                    best = collected.setdefault(id(node), (node, {}))[1]
+                    if kind < best.get(entry_id, 2):
+                        best[entry_id] = kind
+
+        for node, best in collected.values():
+            ranked = sorted(best.items(), key=lambda item: (item[1], item[0]))
+            node[None] = ranked[:max_results]
+
+    def _find(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _near(self, prefix, max_distance):
+        """Yield (distance, node) for trie paths within max_distance edits of the prefix"""
+        first_row = list(range(len(prefix) + 1))
+        stack = [(self._root, first_row)]
+        while stack:
+            node, previous = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    continue
+                current = [previous[0] + 1]
+                for j in range(1, len(prefix) + 1):
+                    current.append(min(
+                        current[j - 1] + 1,
+                        previous[j] + 1,
+                        previous[j - 1] + (prefix[j - 1] != char)
+                    ))
+                if current[-1] <= max_distance:
+                    yield current[-1], child
+                if min(current) <= max_distance:
+                    stack.append((child, current))
+
+    def suggest(self, query, limit=8, max_distance=1):
+        """Ranked entries whose name or one of its words starts with the query
+
+        Exact prefix matches come first; near-prefix matches within
+        max_distance edits fill any remaining places for queries of three or
+        more characters.
+        """
+        prefix = _normalize(query)
+        limit = min(limit, self.max_results)
+        if not prefix or limit <= 0:
+            return []
+
+        ranked = {}
+        node = self._find(prefix)
+        if node is not None:
+            for entry_id, kind in node[None]:
+                ranked[entry_id] = (0, kind, entry_id)
+
+        if len(ranked) < limit and len(prefix) >= 3 and max_distance > 0:
+            for distance, near_node in self._near(prefix, max_distance):
+                if distance == 0:
+                    continue
+                for entry_id, kind in near_node[None]:
+                    key = (distance, kind, entry_id)
+                    if key < ranked.get(entry_id, (max_distance + 1,)):
+                        ranked[entry_id] = key
+
+        best = sorted(ranked.values())[:limit]
+        return [self.entries[entry_id] for _, _, entry_id in best]
+
+
+def _normalize(text):
+    """Lowercase and collapse whitespace"""
+    return ' '.join(text.lower().split())
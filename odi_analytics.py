@@ -0,0 +1,205 @@
+"""Columnar aggregation cube over the historical ODIs in odi_Matches_Data.csv
+
+Every match is stored twice, once from each side's point of view, so "team"
+always means the team whose result is counted. Each dimension is a NumPy
+array of small integer codes into a sorted dictionary of its values; filters
+become boolean masks and a group-by is one np.unique over the combined codes
+followed by np.bincount for the counts, so no query loops over matches in
+Python.
+
+Dimensions: team, opponent, venue, city, country, year, toss ('won' or
+'lost'), toss_decision ('bat' or 'bowl', the toss winner's choice), batting
+('first' or 'second') and result ('won', 'lost' or 'no result').
+"""
+import csv
+import threading
+
+import numpy as np
+
+from odi_history import ODI_MATCHES_CSV
+
+DIMENSIONS = ['team', 'opponent', 'venue', 'city', 'country', 'year', 'toss', 'toss_decision', 'batting', 'result']
+
+# Filters on these match any value containing the argument, e.g. venue=Wankhede
+PARTIAL_MATCH_DIMENSIONS = {'venue', 'city'}
+
+SORT_KEYS = ['matches', 'wins', 'losses', 'win_rate']
+
+_cube = None
+_cube_lock = threading.Lock()
+
+
+def _encode(values):
+    """Dictionary-encode a column: (sorted distinct values, int32 codes)"""
+    labels, codes = np.unique(np.asarray(values), return_inverse=True)
+    return labels.tolist(), codes.astype(np.int32)
+
+
+def _win_rate(wins, losses):
+    decided = wins + losses
+    return round(wins / decided * 100, 1) if decided else None
+
+
+class ODICube:
+    """Dictionary-encoded columns of team-perspective ODI results"""
+
+    def __init__(self, rows):
+        team1 = []
+        team2 = []
+        venue = []
+        city = []
+        country = []
+        year = []
+        toss_winner = []
+        toss_decision = []
+        winner = []
+        for row in rows:
+            team1.append(row.get('Team1 Name') or 'Unknown')
+            team2.append(row.get('Team2 Name') or 'Unknown')
+            venue.append(row.get('Match Venue (Stadium)') or 'Unknown')
+            city.append(row.get('Match Venue (City)') or 'Unknown')
+            country.append(row.get('Match Venue (Country)') or 'Unknown')
+            match_date = row.get('Match Date') or ''
+            year.append(int(match_date[:4]) if match_date[:4].isdigit() else 0)
+            toss_winner.append(row.get('Toss Winner') or '')
+            toss_decision.append(row.get('Toss Winner Choice') or 'unknown')
+            winner.append(row.get('Match Winner') or '')
+
+        # Team1 is the side that batted first in every row of the dataset
+        team = team1 + team2
+        opponent = team2 + team1
+        toss_winner = toss_winner * 2
+        winner = winner * 2
+        raw = {
+            'team': team,
+            'opponent': opponent,
+            'venue': venue * 2,
+            'city': city * 2,
+            'country': country * 2,
+            'year': year * 2,
+            'toss': [
+                'won' if tosser == side else 'lost' if tosser else 'unknown'
+                for side, tosser in zip(team, toss_winner)
+            ],
+            'toss_decision': toss_decision * 2,
+            'batting': ['first'] * len(team1) + ['second'] * len(team2),
+            'result': [
+                'won' if victor == side else 'lost' if victor else 'no result'
+                for side, victor in zip(team, winner)
+            ]
+        }
+
+        self.labels = {}
+        self.codes = {}
+        for dimension in DIMENSIONS:
+            self.labels[dimension], self.codes[dimension] = _encode(raw[dimension])
+
+        self.years = np.asarray(raw['year'], dtype=np.int16)
+        result_labels = self.labels['result']
+        self._won = self.codes['result'] == result_labels.index('won') if 'won' in result_labels else None
+        self._lost = self.codes['result'] == result_labels.index('lost') if 'lost' in result_labels else None
+        self.total_rows = len(team)
+
+    @classmethod
+    def from_csv(cls, path=ODI_MATCHES_CSV):
+        """Load the ODI matches CSV into a cube"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(csv.DictReader(f))
+
+    def _matching_codes(self, dimension, value):
+        value = str(value).strip().lower()
+        labels = self.labels[dimension]
+        if dimension in PARTIAL_MATCH_DIMENSIONS:
+            return [code for code, label in enumerate(labels) if value in str(label).lower()]
+        return [code for code, label in enumerate(labels) if str(label).lower() == value]
+
+    def mask(self, filters=None, year_from=None, year_to=None):
+        """Boolean mask of the rows matching every filter (dimension -> value)"""
+        selected = np.ones(self.total_rows, dtype=bool)
+        for dimension, value in (filters or {}).items():
+            if dimension not in self.codes:
+                raise ValueError(f"Unknown dimension '{dimension}'. Use one of: {', '.join(DIMENSIONS)}")
+            codes = self._matching_codes(dimension, value)
+            selected &= np.isin(self.codes[dimension], codes)
+        if year_from is not None:
+            selected &= self.years >= year_from
+        if year_to is not None:
+            selected &= self.years <= year_to
+        return selected
+
+    def query(self, group_by=(), filters=None, year_from=None, year_to=None,
+              sort='matches', min_matches=0, limit=50):
+        """Match counts, wins, losses and win rate per group of the filtered rows
+
+        Returns (total, groups, total_groups): the totals over every matching
+        row, the top groups by sort (most first) and the number of groups with
+        at least min_matches matches.
+        """
+        for dimension in group_by:
+            if dimension not in self.codes:
+                raise ValueError(f"Unknown dimension '{dimension}'. Use one of: {', '.join(DIMENSIONS)}")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort '{sort}'. Use one of: {', '.join(SORT_KEYS)}")
+
+        selected = self.mask(filters, year_from, year_to)
+        won = self._won[selected] if self._won is not None else np.zeros(int(selected.sum()), dtype=bool)
+        lost = self._lost[selected] if self._lost is not None else np.zeros(int(selected.sum()), dtype=bool)
+
+        wins = int(won.sum())
+        losses = int(lost.sum())
+        total = {
+            'matches': int(selected.sum()),
+            'wins': wins,
+            'losses': losses,
+            'no_results': int(selected.sum()) - wins - losses,
+            'win_rate': _win_rate(wins, losses)
+        }
+        if not group_by:
+            return total, [], 0
+
+        # One int64 key per row from the group-by codes in mixed radix
+        sizes = [len(self.labels[dimension]) for dimension in group_by]
+        keys = np.zeros(int(selected.sum()), dtype=np.int64)
+        for dimension, size in zip(group_by, sizes):
+            keys = keys * size + self.codes[dimension][selected]
+
+        group_keys, inverse = np.unique(keys, return_inverse=True)
+        matches = np.bincount(inverse, minlength=len(group_keys))
+        group_wins = np.bincount(inverse, weights=won, minlength=len(group_keys)).astype(np.int64)
+        group_losses = np.bincount(inverse, weights=lost, minlength=len(group_keys)).astype(np.int64)
+
+        decided = group_wins + group_losses
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(decided > 0, group_wins / decided, -1.0)
+        ranking = {'matches': matches, 'wins': group_wins, 'losses': group_losses, 'win_rate': rates}[sort]
+
+        eligible = np.flatnonzero(matches >= min_matches)
+        # Stable sort keeps groups with equal values in dictionary order
+        order = eligible[np.argsort(-ranking[eligible], kind='stable')][:limit]
+        group_codes = np.unravel_index(group_keys[order], sizes)
+
+        groups = []
+        for position, index in enumerate(order):
+            group = {
+                dimension: self.labels[dimension][int(codes[position])]
+                for dimension, codes in zip(group_by, group_codes)
+            }
+            group.update({
+                'matches': int(matches[index]),
+                'wins': int(group_wins[index]),
+                'losses': int(group_losses[index]),
+                'no_results': int(matches[index] - decided[index]),
+                'win_rate': _win_rate(int(group_wins[index]), int(group_losses[index]))
+            })
+            groups.append(group)
+        return total, groups, len(eligible)
+
+
+def get_cube():
+    """Return the process-wide ODI cube, building it on first use"""
+    global _cube
+    if _cube is None:
+        with _cube_lock:
+            if _cube is None:
+                _cube = ODICube.from_csv()
+    return _cube
@@ -0,0 +1,267 @@
+"""In-memory index over the historical ODI results in odi_Matches_Data.csv
+
+The CSV is parsed once per process and kept as typed match records grouped by
+the unordered team pair, so head-to-head lookups never touch the file again.
+The Playing XI columns are parsed in the same pass into an inverted index from
+player_id to the matches they played, one compact integer array per player.
+"""
+import csv
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+ODI_MATCHES_CSV = os.path.join(os.path.dirname(__file__), 'odi_Matches_Data.csv')
+
+_history = None
+_history_lock = threading.Lock()
+
+# Player ids inside the stringified Playing XI lists, e.g. "['1767', '1793']"
+_PLAYER_ID = re.compile(r'\d+')
+
+
+def pair_key(team1, team2):
+    """Key for an unordered team pair"""
+    return tuple(sorted((team1, team2)))
+
+
+def _format_score(runs, wickets):
+    """Format a runs/wickets pair like 286/7, or N/A when missing"""
+    if not runs or not wickets:
+        return 'N/A'
+    try:
+        return f"{int(float(runs))}/{int(float(wickets))}"
+    except ValueError:
+        return 'N/A'
+
+
+def _parse_player_ids(value):
+    """Player ids from a stringified Playing XI list"""
+    return [int(player_id) for player_id in _PLAYER_ID.findall(value or '')]
+
+
+def _parse_row(row):
+    """Convert a raw CSV row into a typed match record"""
+    match_date = None
+    if row.get('Match Date'):
+        try:
+            match_date = datetime.strptime(row['Match Date'], '%Y-%m-%d').date()
+        except ValueError:
+            pass
+
+    venue = 'Unknown'
+    if row.get('Match Venue (Stadium)') and row.get('Match Venue (City)'):
+        venue = f"{row['Match Venue (Stadium)']}, {row['Match Venue (City)']}"
+    elif row.get('Match Venue (Stadium)'):
+        venue = row['Match Venue (Stadium)']
+
+    if match_date:
+        display_date = match_date.strftime('%B %d, %Y')
+    else:
+        display_date = row.get('Match Date') or 'Unknown'
+
+    return {
+        'date': match_date,
+        'lineups': (_parse_player_ids(row.get('Team1 Playing 11')), _parse_player_ids(row.get('Team2 Playing 11'))),
+        'match': {
+            'match_no': int(float(row['ODI Match No'])) if row.get('ODI Match No') else None,
+            'match_name': row.get('Match Name', 'Unknown'),
+            'series_name': row.get('Series Name', 'Unknown'),
+            'match_date': display_date,
+            'venue': venue,
+            'team1': row.get('Team1 Name', 'Unknown'),
+            'team1_score': _format_score(row.get('Team1 Runs Scored'), row.get('Team1 Wickets Fell')),
+            'team2': row.get('Team2 Name', 'Unknown'),
+            'team2_score': _format_score(row.get('Team2 Runs Scored'), row.get('Team2 Wickets Fell')),
+            'winner': row.get('Match Winner', 'No Result'),
+            'result': row.get('Match Result Text', 'No Result'),
+            'mom': row.get('MOM Player', 'Unknown')
+        }
+    }
+
+
+class ODIHistory:
+    """Historical ODI matches indexed by unordered team pair"""
+
+    def __init__(self, records):
+        # Per pair: match records and their date ordinals, both oldest first.
+        # Undated matches sort before everything else.
+        self._pairs = {}
+        self._pair_ordinals = {}
+
+        grouped = {}
+        for position, record in enumerate(records):
+            match = record['match']
+            key = pair_key(match['team1'], match['team2'])
+            grouped.setdefault(key, []).append((position, record))
+
+        for key, entries in grouped.items():
+            # Newer file rows come first among same-day matches once reversed
+            entries.sort(key=lambda entry: (
+                entry[1]['date'].toordinal() if entry[1]['date'] else 0,
+                -entry[0]
+            ))
+            self._pairs[key] = [record for _, record in entries]
+            self._pair_ordinals[key] = [
+                record['date'].toordinal() if record['date'] else 0
+                for record in self._pairs[key]
+            ]
+
+        # player_id -> array of position * 2 + side (0 for team1, 1 for
+        # team2), oldest match first. The parsed lineups are dropped once
+        # indexed so only the arrays stay in memory.
+        careers = {}
+        for position, record in enumerate(records):
+            for side, lineup in enumerate(record.pop('lineups', ())):
+                for player_id in lineup:
+                    careers.setdefault(player_id, []).append(position * 2 + side)
+
+        ordinals = [record['date'].toordinal() if record['date'] else 0 for record in records]
+        self._records = [record['match'] for record in records]
+        self._ordinals = ordinals
+        self._careers = {
+            player_id: array('I', sorted(entries, key=lambda entry: (ordinals[entry // 2], -(entry // 2))))
+            for player_id, entries in careers.items()
+        }
+
+        self.total_matches = len(records)
+
+    @classmethod
+    def from_csv(cls, path=ODI_MATCHES_CSV):
+        """Parse the ODI matches CSV into an index"""
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [_parse_row(row) for row in csv.DictReader(f)]
+        return cls(records)
+
+    def head_to_head(self, team1, team2, date_from=None, date_to=None, offset=0, limit=10):
+        """Matches between two teams, most recent first, plus a summary of the whole range
+
+        The win/loss summary covers every match in the date range; offset and
+        limit only page the returned match list.
+        """
+        key = pair_key(team1, team2)
+        records = self._pairs.get(key, [])
+        ordinals = self._pair_ordinals.get(key, [])
+
+        start, end = 0, len(records)
+        if date_from:
+            start = bisect_left(ordinals, date_from.toordinal())
+        if date_to:
+            end = bisect_right(ordinals, date_to.toordinal())
+        if date_to and start < end and not records[start]['date']:
+            # Undated matches cannot be placed inside an explicit range
+            start = bisect_right(ordinals, 0, start, end)
+        in_range = records[start:end] if start < end else []
+
+        team1_wins = 0
+        team2_wins = 0
+        for record in in_range:
+            winner = record['match']['winner']
+            if winner == team1:
+                team1_wins += 1
+            elif winner == team2:
+                team2_wins += 1
+
+        # Page through the range newest first without copying all of it
+        page = []
+        newest = len(in_range) - 1 - offset
+        for index in range(newest, max(newest - limit, -1), -1):
+            page.append(in_range[index]['match'])
+
+        summary = {
+            'total_matches': len(in_range),
+            'team1_wins': team1_wins,
+            'team2_wins': team2_wins,
+            'no_results': len(in_range) - team1_wins - team2_wins,
+            'team1': team1,
+            'team2': team2
+        }
+        return summary, page
+
+
+    def matches(self, team=None, date_from=None, date_to=None):
+        """Generate match records in file order, optionally for one team and a date range"""
+        low = date_from.toordinal() if date_from else None
+        high = date_to.toordinal() if date_to else None
+        for match, ordinal in zip(self._records, self._ordinals):
+            if team and team not in (match['team1'], match['team2']):
+                continue
+            if (low is not None or high is not None) and not ordinal:
+                # Undated matches cannot be placed inside an explicit range
+                continue
+            if low is not None and ordinal < low:
+                continue
+            if high is not None and ordinal > high:
+                continue
+            yield match
+
+    def career_length(self, player_id):
+        """Number of ODI matches a player appears in"""
+        return len(self._careers.get(player_id, ()))
+
+    def career(self, player_id, offset=0, limit=10):
+        """A player's ODI matches, most recent first, plus a summary of the whole career
+
+        Each match is the head-to-head match record with the team the player
+        played for and the outcome for that team. The win rate counts only
+        matches with a winner.
+        """
+        entries = self._careers.get(player_id, array('I'))
+
+        wins = 0
+        losses = 0
+        teams = {}
+        for entry in entries:
+            match = self._records[entry // 2]
+            team = match['team2'] if entry % 2 else match['team1']
+            teams[team] = teams.get(team, 0) + 1
+            if match['winner'] == team:
+                wins += 1
+            elif match['winner'] in (match['team1'], match['team2']):
+                losses += 1
+
+        page = []
+        newest = len(entries) - 1 - offset
+        for index in range(newest, max(newest - limit, -1), -1):
+            entry = entries[index]
+            match = self._records[entry // 2]
+            team = match['team2'] if entry % 2 else match['team1']
+            if match['winner'] == team:
+                outcome = 'won'
+            elif match['winner'] in (match['team1'], match['team2']):
+                outcome = 'lost'
+            else:
+                outcome = 'no result'
+            page.append({**match, 'player_team': team, 'outcome': outcome})
+
+        decided = wins + losses
+        summary = {
+            'total_matches': len(entries),
+            'wins': wins,
+            'losses': losses,
+            'no_results': len(entries) - decided,
+            'win_rate': round(wins / decided * 100, 1) if decided else None,
+            'first_match': self._records[entries[0] // 2]['match_date'] if entries else None,
+            'last_match': self._records[entries[-1] // 2]['match_date'] if entries else None,
+            'teams': sorted(teams, key=lambda team: -teams[team])
+        }
+        return summary, page
+
+
+def get_history():
+    """Return the process-wide ODI history index, building it on first use"""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = ODIHistory.from_csv()
+    return _history
+
+
+def parse_date_arg(value):
+    """Parse a YYYY-MM-DD query argument, returning None when absent"""
+    if not value:
+        return None
+    return date.fromisoformat(value)
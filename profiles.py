@@ -0,0 +1,92 @@
+"""Denormalized player profiles for the player modal
+
+A profile holds everything /api/player/performance returns for one player:
+bio, team, role and image, the per-match batting and bowling lines, the
+schedule details of those matches stored once and keyed by match number,
+and the player's tournament totals. ingest.py stores one profile document
+per player so the route is a single keyed read.
+"""
+from leaderboards import build_batting_entries, build_bowling_entries
+
+PROFILES_COLLECTION = 'playerProfilesODIWC2023'
+
+# Fields kept per match line and per match reference; the player's name and
+# the fixture are implied by the profile and the reference
+BATTING_LINE_FIELDS = ['Match_no', 'Team_Innings', 'Batting_Position', 'Runs', 'Balls', '4s', '6s',
+                       'Strike_Rate', 'Dismissal']
+BOWLING_LINE_FIELDS = ['Match_no', 'Bowling_Team', 'Overs', 'Balls_Bowled', 'Maidens', 'Runs', 'Wickets',
+                       'Economy']
+MATCH_REFERENCE_FIELDS = ['Match_no', 'Date', 'Venue', 'Team1', 'Team2', 'Winner']
+
+
+def _pick(document, fields):
+    return {field: document[field] for field in fields if field in document}
+
+
+def _totals(entries, name_field):
+    if not entries:
+        return None
+    totals = dict(entries[0])
+    totals.pop('_id', None)
+    totals.pop(name_field, None)
+    return totals
+
+
+def build_profile(player_name, player, image, batting_rows, bowling_rows, matches_by_number):
+    """Profile of one player from their World Cup and directory entries and their raw rows"""
+    batting_rows = sorted(batting_rows, key=lambda row: row.get('Match_no') or 0)
+    bowling_rows = sorted(bowling_rows, key=lambda row: row.get('Match_no') or 0)
+
+    match_numbers = sorted({row['Match_no'] for row in batting_rows + bowling_rows if row.get('Match_no')})
+    matches = {
+        str(match_no): _pick(matches_by_number[match_no], MATCH_REFERENCE_FIELDS)
+        for match_no in match_numbers
+        if match_no in matches_by_number
+    }
+
+    return {
+        'player_name': player_name,
+        'description': player.get('description', '') if player else '',
+        'team': player.get('team_name', '') if player else '',
+        'role': player.get('playingRole', '') if player else '',
+        'image': image.get('image_url', '') if image else '',
+        'batting': [_pick(row, BATTING_LINE_FIELDS) for row in batting_rows],
+        'bowling': [_pick(row, BOWLING_LINE_FIELDS) for row in bowling_rows],
+        'matches': matches,
+        'totals': {
+            'batting': _totals(build_batting_entries(batting_rows), 'batsman'),
+            'bowling': _totals(build_bowling_entries(bowling_rows), 'bowler')
+        }
+    }
+
+
+def build_profiles(players, players_info, matches, batting, bowling):
+    """Profiles for every World Cup player and everyone who batted or bowled"""
+    players_by_name = {}
+    for player in players:
+        players_by_name.setdefault(player.get('player_name'), player)
+    # The directory repeats some names; the first entry wins, as with find_one
+    images_by_name = {}
+    for info in players_info:
+        images_by_name.setdefault(info.get('player_name'), info)
+    matches_by_number = {match['Match_no']: match for match in matches}
+
+    batting_by_name = {}
+    for row in batting:
+        batting_by_name.setdefault(row.get('Batsman_Name'), []).append(row)
+    bowling_by_name = {}
+    for row in bowling:
+        bowling_by_name.setdefault(row.get('Bowler_Name'), []).append(row)
+
+    names = set(players_by_name) | set(batting_by_name) | set(bowling_by_name)
+    return [
+        build_profile(
+            name,
+            players_by_name.get(name),
+            images_by_name.get(name),
+            batting_by_name.get(name, []),
+            bowling_by_name.get(name, []),
+            matches_by_number
+        )
+        for name in sorted(name for name in names if name)
+    ]
@@ -0,0 +1,136 @@
+"""In-process cache of finished API responses with request coalescing
+
+Responses are stored as sent, headers and compressed body included, keyed by
+the request URL, the content encoding and the data versions they were built
+from, so a hit skips the view, the JSON encoding and the compression. Each
+endpoint has its own time to live, the cache evicts the least recently used
+entries beyond its entry and byte limits, and concurrent misses for the same
+key are coalesced: one request builds the response while the others wait for
+it. bump_data_version() clears the cache through invalidate(), and entries
+built from older data versions are never served. RESPONSE_CACHE_SIZE=0 turns
+the cache off, so every request runs its view (the benchmarks do this).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 60))
+MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_SIZE', 512))
+MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# A follower gives up waiting and builds the response itself after this
+COALESCE_TIMEOUT = 30
+
+# endpoint -> seconds to keep its responses, None for endpoints never cached
+TTL = {
+    'get_suggestions': 300,
+    # Served from the bundled ODI history CSV, which only changes with a deploy
+    'get_head_to_head': 3600,
+    'get_player_career': 3600,
+    'get_odi_analytics': 3600,
+    # Streamed, and too large to keep
+    'export_dataset': None,
+    'get_health': None,
+    'get_live_feed': None,
+}
+
+
+def ttl(endpoint):
+    """Seconds to cache an endpoint's responses, or None"""
+    if MAX_ENTRIES <= 0:
+        return None
+    return TTL.get(endpoint, DEFAULT_TTL)
+
+
+class CachedResponse:
+    """Status, headers and body of a finished response"""
+
+    __slots__ = ('status', 'headers', 'body', 'expires')
+
+    def __init__(self, status, headers, body, expires):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+
+
+class ResponseCache:
+    """LRU of finished responses with per-entry expiry and single-flight misses"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+    def begin(self, key):
+        """Look up a key: ('hit', entry), ('coalesced', entry), ('lead', None) or ('bypass', None)
+
+        'coalesced' is a hit that waited for another request to build it. The
+        caller that gets 'lead' builds the response and must call finish();
+        requests for the same key in the meantime wait for it. 'bypass' means
+        the leader took too long, so the caller builds its own response.
+        """
+        waited = False
+        while True:
+            with self._lock:
+                entry = self._get(key)
+                if entry is not None:
+                    return ('coalesced' if waited else 'hit'), entry
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    self._in_flight[key] = threading.Event()
+                    return 'lead', None
+            waited = True
+            if not flight.wait(COALESCE_TIMEOUT):
+                return 'bypass', None
+
+    def finish(self, key, status=None, headers=None, body=None, ttl=None):
+        """Store the leader's response, if given, and release the requests waiting on it"""
+        with self._lock:
+            if body is not None and ttl and len(body) <= self.max_bytes:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = CachedResponse(status, headers, body, time.monotonic() + ttl)
+                self._size += len(body)
+                while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+            flight = self._in_flight.pop(key, None)
+        if flight is not None:
+            flight.set()
+
+    def invalidate(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'in_flight': len(self._in_flight)}
+
+
+cache = ResponseCache()
+
+
+def reset_after_fork():
+    """Give a forked worker an empty cache of its own"""
+    global cache
+    cache = ResponseCache()
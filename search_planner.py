@@ -0,0 +1,409 @@
+"""Parser and planner for the natural language queries of /api/search
+
+A query is split into tokens and read against the current vocabularies:
+stat keywords, comparisons ("under 5 economy", "more than 400 runs"),
+"top N", venues, teams, and the fuzzy player name index for whatever words
+are left. The intent and slots it finds compile into one aggregation
+pipeline on one collection, so "top 5 bowlers under 5 economy in Chennai"
+costs a single round trip; the matches listed for a team or venue come from
+the planner's copy of the schedule. Parsed plans are cached per planner,
+and a new planner is built whenever the players or the schedule change.
+"""
+import math
+import re
+import threading
+from collections import OrderedDict
+
+from name_index import NameIndex
+
+PLAN_CACHE_SIZE = 1024
+DEFAULT_LIMIT = 5
+PLAYER_LIMIT = 10
+MAX_LIMIT = 50
+MATCH_LIMIT = 5
+
+TOKEN = re.compile(r'\d+(?:\.\d+)?|[a-z]+|[<>]=?')
+
+# board -> collection, grouping fields, and the metrics it can sort and filter on
+BOARDS = {
+    'batting': {
+        'collection': 'batting',
+        'player_field': 'Batsman_Name',
+        'team_field': 'Team_Innings',
+        'totals': {
+            'total_runs': '$Runs',
+            'total_balls': '$Balls',
+            'total_4s': '$4s',
+            'total_6s': '$6s',
+            'innings': 1
+        },
+        # metric -> (field, best first when sorted descending)
+        'metrics': {
+            'runs': ('total_runs', True),
+            'balls': ('total_balls', True),
+            'fours': ('total_4s', True),
+            'sixes': ('total_6s', True),
+            'innings': ('innings', True),
+            'strike_rate': ('strike_rate', True)
+        },
+        # Rates are computed after grouping, for players who faced a ball
+        'rates': {
+            'strike_rate': {'$multiply': [{'$divide': ['$total_runs', '$total_balls']}, 100]}
+        },
+        'default_sort': 'runs'
+    },
+    'bowling': {
+        'collection': 'bowling',
+        'player_field': 'Bowler_Name',
+        'team_field': 'Bowling_Team',
+        'totals': {
+            'total_wickets': '$Wickets',
+            'total_runs': '$Runs',
+            'total_balls': '$Balls_Bowled',
+            'total_maidens': '$Maidens',
+            'innings': 1
+        },
+        'metrics': {
+            'wickets': ('total_wickets', True),
+            'runs': ('total_runs', False),
+            'balls': ('total_balls', True),
+            'maidens': ('total_maidens', True),
+            'innings': ('innings', True),
+            'economy': ('economy', False)
+        },
+        'rates': {
+            'economy': {'$multiply': [{'$divide': ['$total_runs', '$total_balls']}, 6]}
+        },
+        'default_sort': 'wickets'
+    }
+}
+
+BOARD_WORDS = {
+    'batsman': 'batting', 'batsmen': 'batting', 'batter': 'batting', 'batters': 'batting',
+    'batting': 'batting', 'scorer': 'batting', 'scorers': 'batting',
+    'bowler': 'bowling', 'bowlers': 'bowling', 'bowling': 'bowling'
+}
+
+METRIC_WORDS = {
+    'runs': 'runs', 'run': 'runs', 'scored': 'runs',
+    'sixes': 'sixes', 'six': 'sixes',
+    'fours': 'fours', 'four': 'fours', 'boundaries': 'fours',
+    'balls': 'balls', 'innings': 'innings',
+    'wickets': 'wickets', 'wicket': 'wickets',
+    'economy': 'economy',
+    'maidens': 'maidens', 'maiden': 'maidens',
+    'strike rate': 'strike_rate', 'sr': 'strike_rate'
+}
+
+# Board a metric implies when the query names no board
+METRIC_BOARDS = {
+    'runs': 'batting', 'sixes': 'batting', 'fours': 'batting', 'balls': 'batting',
+    'innings': 'batting', 'strike_rate': 'batting',
+    'wickets': 'bowling', 'economy': 'bowling', 'maidens': 'bowling'
+}
+
+COMPARATORS = {
+    'under': '$lt', 'below': '$lt', 'less than': '$lt', 'fewer than': '$lt', '<': '$lt',
+    'at most': '$lte', '<=': '$lte',
+    'over': '$gt', 'above': '$gt', 'more than': '$gt', 'greater than': '$gt', '>': '$gt',
+    'at least': '$gte', 'atleast': '$gte', '>=': '$gte'
+}
+
+COMPARATOR_SYMBOLS = {'$lt': '<', '$lte': '<=', '$gt': '>', '$gte': '>='}
+
+# Words that take the number after them as the result limit
+LIMIT_WORDS = {'top', 'best', 'leading', 'first'}
+
+# Words that fix the sort direction instead of the metric's natural one
+DIRECTION_WORDS = {'most': -1, 'highest': -1, 'lowest': 1, 'fewest': 1, 'least': 1}
+
+OPPONENT_WORDS = {'against', 'vs', 'versus', 'v'}
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'in', 'at', 'of', 'for', 'by', 'with', 'and', 'on', 'from', 'to', 'than',
+    'show', 'me', 'who', 'which', 'what', 'list', 'find', 'all', 'is', 'are', 'has', 'have', 'had',
+    'player', 'players', 'team', 'teams', 'squad', 'match', 'matches', 'games', 'fixtures',
+    'top', 'best', 'leading', 'first', 'stats', 'statistics', 'world', 'cup', 'odi', 'wc',
+    'cricket', 'stadium', 'association', 'ground'
+}
+
+# Venue words too generic to identify a venue on their own
+GENERIC_VENUE_WORDS = {'cricket', 'stadium', 'association', 'ground'}
+
+
+def normalize(name):
+    return ' '.join(name.split()).lower()
+
+
+def tokenize(query):
+    """Lowercase words, numbers and comparison symbols, with two-word phrases joined"""
+    words = TOKEN.findall(query.lower())
+    tokens = []
+    i = 0
+    while i < len(words):
+        pair = ' '.join(words[i:i + 2])
+        if pair in COMPARATORS or pair in METRIC_WORDS:
+            tokens.append(pair)
+            i += 2
+        else:
+            tokens.append(words[i])
+            i += 1
+    return tokens
+
+
+def _number(token):
+    """The numeric value of a token, or None for words and numbers too large for a float"""
+    try:
+        value = float(token)
+    except ValueError:
+        return None
+    if not math.isfinite(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class SearchPlanner:
+    """Vocabularies of one data version and the plans parsed against them"""
+
+    def __init__(self, player_names, matches):
+        self.player_index = NameIndex(player_names)
+
+        # The schedule in stored order, as a find without a sort returns it
+        self.matches = list(matches)
+        self.teams = {}
+        team_matches = {}
+        venue_matches = {}
+        for match in self.matches:
+            for field in ('Team1', 'Team2'):
+                team = match.get(field)
+                if team:
+                    self.teams.setdefault(normalize(team), set()).add(team)
+                    team_matches.setdefault(normalize(team), []).append(match)
+            if match.get('Venue'):
+                venue_matches.setdefault(match['Venue'], []).append(match)
+        self.teams = {key: sorted(spellings) for key, spellings in self.teams.items()}
+        self.team_matches = team_matches
+        self.team_index = NameIndex(sorted({match['Team1'] for match in self.matches if match.get('Team1')}))
+
+        # Every distinctive word of a venue name finds it, so 'lucknow' finds
+        # 'Ekana Cricket Stadium Lucknow'
+        self.venue_matches = venue_matches
+        self.venue_words = {}
+        for venue in venue_matches:
+            for word in TOKEN.findall(venue.lower()):
+                if word not in GENERIC_VENUE_WORDS:
+                    self.venue_words.setdefault(word, []).append(venue)
+
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def plan(self, query):
+        """The cached plan for a query"""
+        tokens = tokenize(query)
+        key = ' '.join(tokens)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        plan = self._compile(self._parse(tokens))
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _team(self, tokens, i):
+        """(team key, tokens used) for a team name starting at tokens[i], or (None, 0)"""
+        for size in (3, 2, 1):
+            key = ' '.join(tokens[i:i + size])
+            if i + size <= len(tokens) and key in self.teams:
+                return key, size
+        return None, 0
+
+    def _parse(self, tokens):
+        """Intent slots: board, metrics, conditions, limit, venues, teams and the leftover name words"""
+        slots = {
+            'board': None,
+            'mentions': [],
+            'conditions': [],
+            'direction': None,
+            'limit': None,
+            'venues': [],
+            'teams': [],
+            'opponents': [],
+            'words': []
+        }
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+
+            if token in COMPARATORS and following is not None and _number(following) is not None:
+                metric = METRIC_WORDS.get(tokens[i + 2]) if i + 2 < len(tokens) else None
+                slots['conditions'].append([metric, COMPARATORS[token], _number(following)])
+                i += 3 if metric else 2
+                if metric is None and slots['mentions']:
+                    # "economy under 5": the comparison belongs to the metric before it
+                    slots['conditions'][-1][0] = slots['mentions'].pop()
+                continue
+            if token in LIMIT_WORDS and following is not None and _number(following) is not None:
+                slots['limit'] = _number(following)
+                i += 2
+                continue
+
+            if token in OPPONENT_WORDS:
+                team, size = self._team(tokens, i + 1)
+                if team is not None:
+                    slots['opponents'].append(team)
+                    i += 1 + size
+                    continue
+            team, size = self._team(tokens, i)
+            if team is not None:
+                slots['teams'].append(team)
+                i += size
+                continue
+
+            if token in BOARD_WORDS:
+                slots['board'] = slots['board'] or BOARD_WORDS[token]
+            elif token in METRIC_WORDS:
+                slots['mentions'].append(METRIC_WORDS[token])
+            elif token in DIRECTION_WORDS:
+                slots['direction'] = DIRECTION_WORDS[token]
+            elif token in self.venue_words:
+                slots['venues'].extend(venue for venue in self.venue_words[token] if venue not in slots['venues'])
+            elif token not in STOP_WORDS and _number(token) is None:
+                slots['words'].append(token)
+            i += 1
+        return slots
+
+    def _compile(self, slots):
+        """Resolve the slots against the vocabularies and build the pipeline"""
+        name_query = ' '.join(slots['words'])
+        # Shorter queries get a stricter threshold to limit false matches
+        threshold = 1 if len(name_query) <= 4 else 2
+        players = self.player_index.search(name_query, threshold) if name_query else []
+        board = slots['board']
+        metrics = slots['mentions'] + [metric for metric, _, _ in slots['conditions'] if metric]
+        if board is None and metrics:
+            board = METRIC_BOARDS[metrics[0]]
+
+        # Leftover words that name no player may still be a misspelled team
+        teams = [self.teams[key][0] for key in slots['teams']]
+        if name_query and not teams and not (players and board):
+            teams = self.team_index.search(name_query, threshold)[:1]
+        opponents = [self.teams[key][0] for key in slots['opponents']]
+
+        if board is not None:
+            return self._compile_board(board, slots, players, teams, opponents)
+
+        interpretation = {'intent': 'player'}
+        plan = {'collection': None, 'pipeline': [], 'matches': []}
+        if teams:
+            team = teams[0]
+            interpretation = {'intent': 'team', 'team': team}
+            plan['collection'] = 'players'
+            plan['pipeline'] = [
+                {'$match': {'team_name': team.strip()}},
+                {'$project': {'_id': 0}},
+                {'$limit': PLAYER_LIMIT}
+            ]
+            plan['matches'] = self._schedule(teams[:1] + opponents, slots['venues'])
+        elif slots['venues'] or opponents:
+            interpretation = {'intent': 'matches'}
+            plan['matches'] = self._schedule(opponents, slots['venues'])
+        elif players:
+            interpretation['players'] = players
+            plan['collection'] = 'players'
+            plan['pipeline'] = [
+                {'$match': {'player_name': {'$in': players}}},
+                {'$project': {'_id': 0}},
+                {'$limit': PLAYER_LIMIT}
+            ]
+        if opponents:
+            interpretation['opponent'] = opponents[0]
+        if slots['venues']:
+            interpretation['venues'] = slots['venues']
+        plan['interpretation'] = interpretation
+        return plan
+
+    def _schedule(self, teams, venues):
+        """Scheduled matches involving every given team, at one of the venues if any are given"""
+        matches = self.matches
+        for team in teams:
+            involved = {id(match) for match in self.team_matches.get(normalize(team), [])}
+            matches = [match for match in matches if id(match) in involved]
+        if venues:
+            matches = [match for match in matches if match.get('Venue') in venues]
+        return matches[:MATCH_LIMIT]
+
+    def _compile_board(self, board, slots, players, teams, opponents):
+        spec = BOARDS[board]
+        metrics = spec['metrics']
+
+        conditions = {}
+        described = []
+        for metric, operator, value in slots['conditions']:
+            metric = metric or spec['default_sort']
+            if metric not in metrics:
+                continue
+            conditions.setdefault(metrics[metric][0], {})[operator] = value
+            described.append({'metric': metric, 'op': COMPARATOR_SYMBOLS[operator], 'value': value})
+
+        sort = next((metric for metric in slots['mentions'] if metric in metrics), spec['default_sort'])
+        sort_field, descending = metrics[sort]
+        direction = slots['direction'] or (-1 if descending else 1)
+
+        limit = slots['limit'] or (PLAYER_LIMIT if players else DEFAULT_LIMIT)
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        match = {}
+        if players:
+            match[spec['player_field']] = {'$in': players}
+        if teams:
+            match[spec['team_field']] = {'$in': self.teams[normalize(teams[0])]}
+        match_numbers = None
+        if slots['venues']:
+            match_numbers = {m['Match_no'] for venue in slots['venues'] for m in self.venue_matches[venue]}
+        for opponent in opponents:
+            played = {m['Match_no'] for m in self.team_matches[normalize(opponent)]}
+            match_numbers = played if match_numbers is None else match_numbers & played
+            if not teams:
+                match[spec['team_field']] = {'$nin': self.teams[normalize(opponent)]}
+        if match_numbers is not None:
+            match['Match_no'] = {'$in': sorted(match_numbers)}
+
+        pipeline = []
+        if match:
+            pipeline.append({'$match': match})
+        pipeline.append({'$group': {
+            '_id': '$' + spec['player_field'],
+            **{field: {'$sum': value} for field, value in spec['totals'].items()}
+        }})
+        rates = {metric: expression for metric, expression in spec['rates'].items()
+                 if metric == sort or metrics[metric][0] in conditions}
+        if rates:
+            pipeline.append({'$match': {'total_balls': {'$gt': 0}}})
+            pipeline.append({'$addFields': rates})
+        if conditions:
+            pipeline.append({'$match': conditions})
+        pipeline.append({'$sort': {sort_field: direction, '_id': 1}})
+        pipeline.append({'$limit': limit})
+
+        interpretation = {'intent': board, 'sort': sort, 'order': 'desc' if direction == -1 else 'asc', 'limit': limit}
+        if described:
+            interpretation['conditions'] = described
+        if players:
+            interpretation['players'] = players
+        if teams:
+            interpretation['team'] = teams[0]
+        if opponents:
+            interpretation['opponent'] = opponents[0]
+        if slots['venues']:
+            interpretation['venues'] = slots['venues']
+        return {
+            'collection': spec['collection'],
+            'pipeline': pipeline,
+            'matches': [],
+            'interpretation': interpretation
+        }
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The tests run against the bundled CSVs through the in-memory backend
+os.environ['DATA_BACKEND'] = 'memory'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client():
+    import app
+    import response_cache
+    response_cache.cache.invalidate()
+    return app.app.test_client()
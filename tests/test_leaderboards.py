@@ -0,0 +1,36 @@
+import pytest
+
+import leaderboards
+from leaderboards import BATTING_METRICS, Leaderboard
+
+
+def make_board():
+    entries = [
+        {'batsman': name, 'total_runs': runs, 'total_6s': sixes}
+        for name, runs, sixes in [('A', 10, 1), ('B', 30, 0), ('C', 20, 2)]
+    ]
+    return Leaderboard(entries, BATTING_METRICS, 'batsman')
+
+
+def test_repeated_metrics_are_ignored():
+    board = make_board()
+    assert board.parse_sort('runs,runs,-runs,sixes') == (('runs', True), ('sixes', True))
+
+
+def test_too_many_metrics_are_rejected():
+    with pytest.raises(ValueError):
+        make_board().parse_sort('runs,sixes,fours,balls')
+
+
+def test_sort_orders_are_bounded(monkeypatch):
+    monkeypatch.setattr(leaderboards, 'ORDER_CACHE_SIZE', 2)
+    board = make_board()
+    for sort in ('runs', 'sixes', '-runs', 'runs'):
+        board.page(sort)
+    assert list(board._orders) == [(('runs', False),), (('runs', True),)]
+    assert [entry['batsman'] for entry in board.page('runs')[1]] == ['B', 'C', 'A']
+
+
+def test_too_many_metrics_answer_400(client):
+    response = client.get('/api/batting/top?sort=runs,sixes,fours,balls')
+    assert response.status_code == 400
@@ -0,0 +1,11 @@
+def test_malformed_match_no_answers_400(client):
+    response = client.get('/api/live?match_no=abc')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'match_no must be a match number'
+
+
+def test_invalid_backend_is_reported_as_itself(client, monkeypatch):
+    monkeypatch.setenv('DATA_BACKEND', 'sqlite')
+    response = client.get('/api/live?match_no=1')
+    assert response.status_code == 500
+    assert 'DATA_BACKEND' in response.get_json()['error']
@@ -0,0 +1,26 @@
+def test_empty_argument_does_not_share_the_plain_url_entry(client):
+    empty = client.get('/api/best-moments?type=')
+    plain = client.get('/api/best-moments')
+    assert plain.headers['X-Cache'] == 'MISS'
+    assert plain.headers['ETag'] != empty.headers['ETag']
+    assert plain.get_json()['total'] > 0
+
+
+def test_invalid_empty_sort_is_not_served_from_the_cache(client):
+    assert client.get('/api/batting/top').status_code == 200
+    response = client.get('/api/batting/top?sort=')
+    assert response.status_code == 400
+    assert 'X-Cache' not in response.headers
+
+
+def test_repeated_argument_order_is_part_of_the_key(client):
+    first = client.get('/api/batting/top?limit=1&limit=3')
+    second = client.get('/api/batting/top?limit=3&limit=1')
+    assert second.headers['X-Cache'] == 'MISS'
+    assert first.headers['ETag'] != second.headers['ETag']
+
+
+def test_argument_order_shares_one_entry(client):
+    client.get('/api/batting/top?sort=runs&limit=3')
+    response = client.get('/api/batting/top?limit=3&sort=runs')
+    assert response.headers['X-Cache'] == 'HIT'
@@ -0,0 +1,19 @@
+from search_planner import SearchPlanner, _number
+
+
+def test_number_rejects_values_too_large_for_a_float():
+    assert _number('9' * 400) is None
+    assert _number('5') == 5
+    assert _number('4.5') == 4.5
+
+
+def test_overlong_limit_falls_back_to_the_default():
+    planner = SearchPlanner(['Jasprit Bumrah'], [])
+    plan = planner.plan('top ' + '9' * 400 + ' bowlers')
+    assert plan['collection'] == 'bowling'
+
+
+def test_search_with_overlong_number_answers(client):
+    response = client.get('/api/search', query_string={'q': 'top ' + '9' * 400 + ' bowlers'})
+    assert response.status_code == 200
+    assert response.get_json()['query']['limit'] == 5
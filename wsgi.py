@@ -0,0 +1,17 @@
+"""WSGI entry point for pre-forking servers: gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the master imports this module once, before forking, so
+the shared read-only data is built a single time and every worker inherits
+it copy-on-write. gc.freeze() moves those objects out of the collector's
+reach, so garbage collection in a worker does not write to (and copy) the
+shared pages. The master's MongoDB client is closed before the fork; each
+worker opens its own.
+"""
+import gc
+
+import database
+from app import app, preload_shared_data
+
+preload_shared_data()
+database.close_for_fork()
+gc.freeze()